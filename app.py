@@ -1,743 +1,564 @@
 import streamlit as st
 import pandas as pd
-import re
-import csv
-import time
+import hashlib
 import os
-import glob
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
-from openpyxl.styles import PatternFill
-from openpyxl.styles import NamedStyle
 
-
-# ============================================================================
-# FUNCIÓN DE REDONDEO AGRESIVO
-# ============================================================================
-
-
-def redondear_agresivo(valor):
-    """Redondea agresivamente a 2 decimales usando Decimal para mayor precisión"""
-    if pd.isna(valor) or valor == 0 or valor == "":
-        return valor
-    try:
-        # Convertir a Decimal para mayor precisión y luego redondear
-        decimal_val = Decimal(str(float(valor))).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
-        )
-        return float(decimal_val)
-    except (ValueError, TypeError, InvalidOperation):
-        return valor
-
-
-# ============================================================================
-# FUNCIONES DE LECTURA Y LIMPIEZA DE ARCHIVOS
-# ============================================================================
-
-
-def leer_archivo(file_path):
-    """Lee el archivo con manejo de codificación UTF-8 o Latin-1"""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.readlines()
-    except UnicodeDecodeError:
-        with open(file_path, "r", encoding="latin-1") as f:
-            return f.readlines()
-
-
-def procesar_encabezado(lines):
-    """Procesa y extrae la información del encabezado del archivo"""
-    try:
-        encabezado = lines[1:7]
-        encabezado_limpio = [line.replace("\n", "").strip() for line in encabezado]
-
-        return {
-            "RAZON SOCIAL": encabezado_limpio[0],
-            "DIRECCION": encabezado_limpio[1],
-            "CUIT": encabezado_limpio[2],
-            "LIBRO": encabezado_limpio[3].split("  ")[-1],
-            "PERIODO": encabezado_limpio[4].split("  ")[-1],
-        }
-    except Exception as e:
-        st.error(f"Ocurrió un error al procesar el encabezado: {e}")
-        return {}
-
-
-def limpiar_lineas(lines):
-    """Limpia las líneas del archivo eliminando caracteres de control y bloques no deseados"""
-    cleaned_lines = []
-    eliminar = False
-    eliminar_desde_totales = False
-    compras_o_ventas = ""
-
-    for i, line in enumerate(lines[9:], start=2):
-        # Detectar tipo de operación
-        if "IVA VENTAS" in line:
-            compras_o_ventas = "Ventas"
-        elif "IVA COMPRAS" in line:
-            compras_o_ventas = "Compras"
-
-        # Detectar fin de datos
-        if "TOTALES POR TASA" in line:
-            eliminar_desde_totales = True
-            continue
-
-        if eliminar_desde_totales:
-            break
-
-        # Manejar bloques a eliminar
-        if line.startswith("----"):
-            eliminar = True
-            continue
-
-        if line.startswith("--"):
-            eliminar = False
-            continue
-
-        # Procesar líneas válidas
-        if not eliminar:
-            cleaned_line = re.sub(r"\x1b[^m]*m", "", line)  # Elimina secuencias ANSI
-            cleaned_line = re.sub(
-                r"[\x00-\x1F\x7F]", "", cleaned_line
-            )  # Eliminación de caracteres de control ASCII
-            cleaned_lines.append(cleaned_line)
-
-    return cleaned_lines, compras_o_ventas
-
-
-def limpiar_lineas_adicional(cleaned_lines):
-    """Segunda limpieza de líneas eliminando líneas con PPag"""
-    doble_cleaned_lines = []
-
-    for i, line in enumerate(cleaned_lines, start=-1):
-        if "PPag." in line or len(line.strip()) < 35:
-            if re.search(r"PPag\.\:\s*\d+\s*$", line):
-                linea = re.sub(r"PPag\.\:\s*\d+\s*$", "", line)
-                cleaned_lines.append(linea)
-            else:
-                break
-        doble_cleaned_lines.append(line)
-
-    return doble_cleaned_lines
+from iva_simple.arca import (
+    asignar_actividades_arca,
+    formatear_concepto_para_display,
+    generar_archivos_csv_arca,
+    obtener_conceptos_unicos,
+    preagregar_arca,
+)
+from iva_simple.cache import CacheResultados, clave_cache_huella, huella_contenido
+from iva_simple.dataframes import combinar_dataframes_archivos
+from iva_simple.diagnostico import Diagnostico, iniciar_medicion, registrar_tiempo
+from iva_simple.excel import excel_en_bytes
+from iva_simple.lectura import ErrorTipoArchivo
+from iva_simple.montos import centavos_a_pesos
+from iva_simple.parquet import movimientos_a_parquet
+from iva_simple.pipeline import parsear_archivo_por_paginas, parsear_archivos_en_paralelo
+from iva_simple.tasas import formato_arca
 
 
 # ============================================================================
-# FUNCIONES DE PROCESAMIENTO DE MOVIMIENTOS
+# CACHÉ DE RESULTADOS ENTRE SESIONES
 # ============================================================================
 
 
-def procesar_movimientos(doble_cleaned_lines, compras_o_ventas):
-    """Procesa las líneas limpias y extrae los movimientos"""
-    movements = []
-    temp_movement = {}
-
-    for index, cleaned_line in enumerate(doble_cleaned_lines):
-        # Procesar líneas continuas del mismo movimiento
-        if "numero" in temp_movement and temp_movement["numero"] == cleaned_line[12:20]:
-            procesar_linea_continuacion(cleaned_line, temp_movement, compras_o_ventas)
-        else:
-            # Procesar nueva línea de movimiento
-            if cleaned_line[0:2] == "  ":
-                procesar_linea_continuacion(
-                    cleaned_line, temp_movement, compras_o_ventas
-                )
-                if index == len(doble_cleaned_lines) - 1:
-                    movements.append(temp_movement)
-            else:
-                # Nueva entrada de movimiento
-                movement = temp_movement.copy()
-                movements.append(movement)
-                temp_movement.clear()
-
-                procesar_nueva_entrada(cleaned_line, temp_movement, compras_o_ventas)
-
-                if index == len(doble_cleaned_lines) - 1:
-                    movements.append(temp_movement)
-
-    # Limpiar movimiento vacío inicial
-    if not movements[0]:
-        movements.pop(0)
-
-    return movements
-
-
-def procesar_linea_continuacion(cleaned_line, temp_movement, compras_o_ventas):
-    """Procesa una línea que continúa un movimiento existente"""
-    partes = re.split(r"\s{3,}", cleaned_line[70:])
-    if len(partes) < 2:
-        return
-
-    tasa = partes[0]
-    if tasa in [
-        "Tasa 21%",
-        "T.10.5%",
-        "Tasa 27%",
-        "C.F.21%",
-        "C.F.10.5%",
-        "Tasa 2.5%",
-        "T.IMP 21%",
-        "T.IMP 10%",
-    ]:
-        procesar_tasa_con_neto_iva(tasa, partes, temp_movement)
-    elif tasa in ["R.Monot21", "R.Mont.10"]:
-        procesar_tasa_monotributo(tasa, partes, temp_movement, compras_o_ventas)
-    else:
-        procesar_otra_tasa(tasa, partes, temp_movement)
+@st.cache_resource
+def obtener_cache_resultados():
+    """Caché de resultados del proceso, configurable con variables de entorno.
 
-
-def procesar_tasa_con_neto_iva(tasa, partes, temp_movement):
-    """Procesa tasas que tienen neto e IVA separados"""
-    if tasa + " Neto" in temp_movement:
-        # Sumar valores existentes
-        neto_anterior = float(temp_movement[tasa + " Neto"].replace(",", "."))
-        iva_anterior = float(temp_movement[tasa + " IVA"].replace(",", "."))
-        neto_nuevo = float(partes[1].replace(",", "."))
-        iva_nuevo = float(partes[2].replace(",", "."))
-
-        temp_movement[tasa + " Neto"] = round(neto_anterior + neto_nuevo, 2)
-        temp_movement[tasa + " IVA"] = round(iva_anterior + iva_nuevo, 2)
-    else:
-        # Primer valor
-        temp_movement[tasa + " Neto"] = partes[1]
-        temp_movement[tasa + " IVA"] = partes[2]
-
-
-def procesar_tasa_monotributo(tasa, partes, temp_movement, compras_o_ventas):
-    """Procesa tasas de monotributo"""
-    if compras_o_ventas == "Ventas":
-        if tasa + " Neto" in temp_movement:
-            neto_anterior = float(temp_movement[tasa + " Neto"].replace(",", "."))
-            iva_anterior = float(temp_movement[tasa + " IVA"].replace(",", "."))
-            neto_nuevo = float(partes[1].replace(",", "."))
-            iva_nuevo = float(partes[2].replace(",", "."))
-
-            temp_movement[tasa + " Neto"] = round(neto_anterior + neto_nuevo, 2)
-            temp_movement[tasa + " IVA"] = round(iva_anterior + iva_nuevo, 2)
-        else:
-            temp_movement[tasa + " Neto"] = partes[1]
-            temp_movement[tasa + " IVA"] = partes[2]
-    else:
-        temp_movement[tasa] = partes[1]
-
-
-def procesar_otra_tasa(tasa, partes, temp_movement):
-    """Procesa otras tasas que no tienen neto/IVA separados"""
-    if tasa in temp_movement:
-        if isinstance(temp_movement[tasa], float):
-            numero_actual = float(partes[1].replace(",", "."))
-            temp_movement[tasa] = round(temp_movement[tasa] + numero_actual, 2)
-        else:
-            numero_anterior = float(temp_movement[tasa].replace(",", "."))
-            numero_actual = float(partes[1].replace(",", "."))
-            temp_movement[tasa] = round(numero_anterior + numero_actual, 2)
-    else:
-        temp_movement[tasa] = partes[1]
+    IVA_SIMPLE_CACHE_MB (memoria, 512 por defecto), IVA_SIMPLE_CACHE_DIR (directorio
+    en disco, desactivado por defecto) e IVA_SIMPLE_CACHE_DISCO_MB (2048 por defecto).
+    """
+    megabyte = 1024 * 1024
+    return CacheResultados(
+        max_bytes_memoria=int(os.environ.get("IVA_SIMPLE_CACHE_MB", "512")) * megabyte,
+        directorio=os.environ.get("IVA_SIMPLE_CACHE_DIR") or None,
+        max_bytes_disco=int(os.environ.get("IVA_SIMPLE_CACHE_DISCO_MB", "2048"))
+        * megabyte,
+    )
 
 
-def procesar_nueva_entrada(cleaned_line, temp_movement, compras_o_ventas):
-    """Procesa una nueva entrada de movimiento"""
-    partes = re.split(r"\s{3,}", cleaned_line[70:])
-    if len(partes) < 2:
-        return
+def clave_archivo_subido(uploaded_file, tipo_movimiento, combinar_no_consecutivos):
+    """Clave de caché de un archivo subido, hasheando su contenido una sola vez por subida.
 
-    temp_movement.update(
-        {
-            "Fecha": cleaned_line[0:2],
-            "Comprobante": cleaned_line[3:5],
-            "PV": cleaned_line[6:11],
-            "Nro": cleaned_line[12:20],
-            "Letra": cleaned_line[20:21],
-            "Razon Social": cleaned_line[22:44],
-            "Condicion": cleaned_line[45:49],
-            "CUIT": cleaned_line[50:63],
-            "Concepto": cleaned_line[64:67],
-            "Jurisdiccion": cleaned_line[68:69],
-        }
+    Cada rerun de Streamlit vuelve a entregar el mismo archivo (con el mismo
+    file_id) mientras no se cambie la subida, así que la huella se guarda en
+    session_state en lugar de recalcularla en cada interacción.
+    """
+    huellas = st.session_state.setdefault("huellas_archivos", {})
+    if uploaded_file.file_id not in huellas:
+        huellas[uploaded_file.file_id] = huella_contenido(uploaded_file.getvalue())
+    return clave_cache_huella(
+        huellas[uploaded_file.file_id], tipo_movimiento, combinar_no_consecutivos
     )
 
-    # Procesar montos
-    if len(partes) == 3:
-        primer_monto = partes[1].split(" ")
-        primer_monto = list(filter(None, primer_monto))
-        segundo_monto = partes[1].split(" ")
-        segundo_monto = list(filter(None, segundo_monto))
-        partes = [partes[0]] + primer_monto + segundo_monto
-
-    tasa = partes[0]
-    if tasa in [
-        "Tasa 21%",
-        "T.10.5%",
-        "Tasa 27%",
-        "C.F.21%",
-        "C.F.10.5%",
-        "Tasa 2.5%",
-        "T.IMP 21%",
-        "T.IMP 10%",
-    ]:
-        temp_movement[tasa + " Neto"] = partes[1]
-        temp_movement[tasa + " IVA"] = partes[2]
-    elif tasa in ["R.Monot21", "R.Mont.10"]:
-        if compras_o_ventas == "Ventas":
-            temp_movement[tasa + " Neto"] = partes[1]
-            temp_movement[tasa + " IVA"] = partes[2]
-        else:
-            temp_movement[tasa] = partes[1]
-    else:
-        temp_movement[tasa] = partes[1]
+
+def montos_dispersos_activados():
+    """Con IVA_SIMPLE_MONTOS_DISPERSOS=1 las tasas poco usadas se guardan como columnas dispersas"""
+    return os.environ.get("IVA_SIMPLE_MONTOS_DISPERSOS", "0") == "1"
 
 
 # ============================================================================
-# FUNCIONES DE PROCESAMIENTO DE DATAFRAMES
+# FUNCIÓN PRINCIPAL
 # ============================================================================
 
 
-def crear_dataframe_movimientos(movements):
-    """Crea y procesa el DataFrame de movimientos"""
-    df = pd.DataFrame(movements)
-    df = df.fillna(0)
-
-    # Reemplazar comas por puntos en columnas numéricas
-    df.iloc[:, 11:] = df.iloc[:, 11:].replace(",", ".", regex=True)
-    df.iloc[:, 11:] = df.iloc[:, 11:].apply(pd.to_numeric, errors="coerce").fillna(0)
-
-    # Aplicar redondeo agresivo para eliminar errores de precisión desde el inicio
-    for col in df.columns[11:]:
-        df[col] = df[col].apply(redondear_agresivo)
-
-    # Convertir notas de crédito a negativas
-    columnas_a_convertir = df.columns[11:]
-    df.loc[df["Comprobante"] == "NC", columnas_a_convertir] *= -1
-
-    # Redondear nuevamente después de la multiplicación por -1
-    for col in df.columns[11:]:
-        df[col] = df[col].apply(redondear_agresivo)
-
-    # Convertir tipos de datos
-    df["PV"] = pd.to_numeric(df["PV"])
-    df["Nro"] = pd.to_numeric(df["Nro"])
-    df["Concepto"] = pd.to_numeric(df["Concepto"])
-
-    return df
-
+def mensaje_error_archivo(e):
+    """Mensaje para mostrar cuando falla el procesamiento de un archivo"""
+    if isinstance(e, ErrorTipoArchivo):
+        return f"❌ **Error de validación**: El archivo contiene movimientos de **{e.detectado}** pero seleccionaste **{e.esperado}**. Por favor, verifica tu selección o sube el archivo correcto."
+    return f"Error al procesar el archivo: {e}"
 
-def combinar_movimientos_duplicados(df):
-    """Combina movimientos que tienen la misma clave principal"""
-    resultado = []
-    fila_actual = df.iloc[0].copy()
 
-    for i in range(1, len(df)):
-        fila_siguiente = df.iloc[i]
+def procesar_archivo(
+    fuente, tipo_esperado=None, combinar_no_consecutivos=False, diagnostico=None
+):
+    """Función principal que procesa el archivo completo (ruta, bytes u objeto tipo archivo).
 
-        # Si la clave principal se repite, combinar valores
-        if (
-            fila_actual["Nro"] == fila_siguiente["Nro"]
-            and fila_actual["PV"] == fila_siguiente["PV"]
-            and fila_actual["Razon Social"] == fila_siguiente["Razon Social"]
-        ):
-
-            for col in df.columns[11:]:  # Sumar solo las columnas numéricas
-                fila_actual[col] = redondear_agresivo(
-                    fila_actual[col] + fila_siguiente[col]
-                )
-        else:
-            resultado.append(fila_actual)
-            fila_actual = fila_siguiente.copy()
+    Devuelve (df_movimientos, encabezado); el Excel se genera aparte, solo si
+    se pide (mostrar_descarga_excel).
+    """
+    try:
+        df_final_sin_totales, encabezado_completo, compras_o_ventas = (
+            parsear_archivo_por_paginas(
+                fuente,
+                tipo_esperado,
+                diagnostico,
+                combinar_no_consecutivos=combinar_no_consecutivos,
+                montos_dispersos=montos_dispersos_activados(),
+            )
+        )
 
-    resultado.append(fila_actual)
-    return pd.DataFrame(resultado)
+        if not encabezado_completo:
+            st.error("Ocurrió un error al procesar el encabezado del archivo")
 
+        if not compras_o_ventas:
+            st.warning(
+                "⚠️ No se pudo detectar automáticamente el tipo de movimientos en el archivo. Continuando con el procesamiento..."
+            )
 
-def agregar_totales_movimientos(df_final):
-    """Agrega fila de totales al DataFrame de movimientos"""
-    df_final["Total"] = df_final.iloc[:, 11:].sum(axis=1)
+        st.success("¡Archivo procesado con éxito!")
+        return df_final_sin_totales, encabezado_completo
 
-    # Crear fila de totales
-    fila_total = pd.DataFrame(df_final.iloc[:, 11:].sum()).T
-    fila_total.insert(0, "Nro", "TOTALES")
-    fila_total.insert(1, "Razon Social", "")
+    except Exception as e:
+        st.error(mensaje_error_archivo(e))
+        return None, None
 
-    return pd.concat([df_final, fila_total], ignore_index=True)
+    finally:
+        if diagnostico is not None:
+            diagnostico.finalizar()
 
 
 # ============================================================================
-# FUNCIONES PARA GENERAR ARCHIVOS ARCA (CSV)
+# INTERFAZ DE STREAMLIT
 # ============================================================================
 
 
-def obtener_conceptos_unicos(df):
-    """Obtiene los conceptos únicos presentes en ventas (no NC)"""
-    conceptos_en_ventas = set(
-        df[df["Comprobante"] != "NC"]["Concepto"].astype(str).unique()
-    )
-    return sorted(list(conceptos_en_ventas))
-
-
-def formatear_concepto_para_display(concepto):
-    """Formatea un concepto solo para mostrar en la interfaz (quita .0 innecesarios)"""
-    try:
-        # Si es un número entero (ej: "106.0"), mostrar sin decimales
-        if "." in str(concepto) and float(concepto) == int(float(concepto)):
-            return str(int(float(concepto)))
-        else:
-            return str(concepto)
-    except (ValueError, TypeError):
-        # Si no se puede convertir a número, devolver como está
-        return str(concepto)
-
-
-def procesar_dataframe_para_arca(df, actividad_por_concepto):
-    """Procesa el DataFrame y genera los datos para ARCA"""
-    registros_salida = []
-
-    # Conceptos que deben tener código "3"
-    conceptos_3 = ["84", "85", "152"]
-
-    # Columnas de tasas y sus respectivos códigos de alícuota
-    columnas_tasas = [
-        ("Tasa 21% Neto", "Tasa 21% IVA", "5"),
-        ("C.F.21% Neto", "C.F.21% IVA", "5"),
-        ("T.10.5% Neto", "T.10.5% IVA", "4"),
-        ("C.F.10.5% Neto", "C.F.10.5% IVA", "4"),
-        ("Tasa 27% Neto", "Tasa 27% IVA", "6"),
-        ("R.Monot21 Neto", "R.Monot21 IVA", "5"),
-        ("R.Mont.10 Neto", "R.Mont.10 IVA", "4"),
-    ]
-
-    for _, row in df.iterrows():
-        # Tipo de operación según concepto
-        concepto_nuevo = "2" if str(row["Concepto"]) in conceptos_3 else "1"
-
-        # Tipo de sujeto comprador según condición
-        condicion = str(row.get("Condicion", "")).strip().upper()
-        if condicion == "INS.":
-            tipo_sujeto = "1"
-        elif condicion in ["EXE", "C.F."]:
-            tipo_sujeto = "3"
-        elif condicion == "MONO":
-            tipo_sujeto = "2"
-        else:
-            tipo_sujeto = ""
-
-        es_nc = str(row.get("Comprobante", "")).upper() == "NC"
-
-        # Procesar tasas
-        for tasa_neto_columna, tasa_iva_columna, codigo_alicuota in columnas_tasas:
-            if tasa_neto_columna in df.columns and tasa_iva_columna in df.columns:
-                monto_neto = row[tasa_neto_columna]
-                iva = row[tasa_iva_columna]
-
-                if monto_neto == 0 and iva == 0:
-                    continue
-
-                if es_nc:
-                    monto_neto = abs(monto_neto)
-                    iva = abs(iva)
-
-                registro = {
-                    "Tipo de Operacion": concepto_nuevo,
-                    "Tipo de sujeto comprador": tipo_sujeto,
-                    "Codigo de Alicuota": codigo_alicuota,
-                    "Monto Neto Gravado": redondear_agresivo(monto_neto),
-                    "Debito Fiscal Facturado": redondear_agresivo(iva),
-                    "Debito Fiscal O.D.P.": redondear_agresivo(iva),
-                    "Monto Neto Exento o No Gravado": 0,
-                    "EsNotaCredito": es_nc,
-                    "Concepto_original": str(row["Concepto"]),
-                    "idx_original": row.name,
-                }
-                registros_salida.append(registro)
-
-        # Exento
-        if "Exento" in df.columns:
-            exento = row["Exento"]
-            if exento != 0:
-                monto_neto_exento = abs(exento) if es_nc else exento
-                registro = {
-                    "Tipo de Operacion": concepto_nuevo,
-                    "Tipo de sujeto comprador": tipo_sujeto,
-                    "Codigo de Alicuota": "3",
-                    "Monto Neto Gravado": 0,
-                    "Debito Fiscal Facturado": 0,
-                    "Debito Fiscal O.D.P.": 0,
-                    "Monto Neto Exento o No Gravado": redondear_agresivo(
-                        monto_neto_exento
-                    ),
-                    "EsNotaCredito": es_nc,
-                    "Concepto_original": str(row["Concepto"]),
-                    "idx_original": row.name,
-                }
-                registros_salida.append(registro)
-
-    # Crear DataFrame completo
-    df_salida = pd.DataFrame(registros_salida)
-
-    # Eliminar filas donde 'Tipo de sujeto comprador' está vacío
-    df_salida = df_salida[
-        df_salida["Tipo de sujeto comprador"].astype(str).str.strip() != ""
-    ]
-
-    # Agregar la columna "Concepto" al df_salida temporalmente para poder mapear actividad
-    df_salida["Concepto"] = (
-        df.loc[df_salida["idx_original"], "Concepto"].astype(str).values
+def mostrar_descarga_diferida(
+    clave,
+    construir,
+    formato,
+    boton,
+    ayuda_boton,
+    file_name,
+    mime,
+    ayuda_descarga=None,
+    filas=0,
+    diagnostico=None,
+):
+    """Genera un archivo de descarga solo cuando se pide y lo guarda para las descargas siguientes.
+
+    construir() arma los bytes del archivo; queda en st.session_state[clave]
+    y su tiempo se registra en el diagnóstico con la etapa formato en minúsculas.
+    """
+    if st.session_state.get(clave) is None:
+        if not st.button(boton, help=ayuda_boton):
+            return
+
+        with st.spinner(f"Generando archivo {formato}..."):
+            try:
+                inicio = iniciar_medicion(diagnostico)
+                st.session_state[clave] = construir()
+                registrar_tiempo(diagnostico, formato.lower(), inicio, filas)
+            except Exception as e:
+                st.error(f"❌ Error al generar el archivo {formato}: {e}")
+                return
+            finally:
+                if diagnostico is not None:
+                    diagnostico.finalizar()
+
+    st.download_button(
+        label=f"📥 Descargar movimientos ({formato})",
+        data=st.session_state[clave],
+        file_name=file_name,
+        mime=mime,
+        help=ayuda_descarga,
     )
 
-    # Asignar columna "Actividad" según el concepto
-    df_salida["Actividad"] = df_salida["Concepto"].map(actividad_por_concepto)
-
-    # Eliminar columna "Concepto" antes de continuar
-    df_salida = df_salida.drop(columns=["Concepto"])
-
-    return df_salida
-
-
-def generar_archivos_csv_arca(df_salida):
-    """Genera los archivos CSV para ARCA"""
-    # Separar notas de crédito y otros
-    df_nc = df_salida[df_salida["EsNotaCredito"] == True].copy()
-    df_otros = df_salida[df_salida["EsNotaCredito"] == False].copy()
-
-    # Eliminar columna auxiliar antes de agrupar
-    df_nc = df_nc.drop(columns=["EsNotaCredito"], errors="ignore")
-    df_nc = df_nc.drop(columns=["Debito Fiscal O.D.P."], errors="ignore")
-    df_otros = df_otros.drop(columns=["EsNotaCredito"], errors="ignore")
-
-    # Agrupar incluyendo la columna "Actividad" como primer campo
-    df_nc_agrupado = df_nc.groupby(
-        [
-            "Actividad",
-            "Tipo de Operacion",
-            "Tipo de sujeto comprador",
-            "Codigo de Alicuota",
-        ],
-        as_index=False,
-    ).sum()
-    df_otros_agrupado = df_otros.groupby(
-        [
-            "Actividad",
-            "Tipo de Operacion",
-            "Tipo de sujeto comprador",
-            "Codigo de Alicuota",
-        ],
-        as_index=False,
-    ).sum()
-
-    # Redondear inmediatamente después de agrupar para evitar errores de precisión acumulados
-    columnas_numericas_temp = [
-        "Monto Neto Gravado",
-        "Debito Fiscal Facturado",
-        "Debito Fiscal O.D.P.",
-        "Monto Neto Exento o No Gravado",
-    ]
-    for col in columnas_numericas_temp:
-        if col in df_nc_agrupado.columns:
-            df_nc_agrupado[col] = df_nc_agrupado[col].apply(redondear_agresivo)
-        if col in df_otros_agrupado.columns:
-            df_otros_agrupado[col] = df_otros_agrupado[col].apply(redondear_agresivo)
-
-    # Reordenar columnas para que "Actividad" quede primera
-    column_order_nc = ["Actividad"] + [
-        col for col in df_nc_agrupado.columns if col != "Actividad"
-    ]
-    column_order_otros = ["Actividad"] + [
-        col for col in df_otros_agrupado.columns if col != "Actividad"
-    ]
-
-    df_nc_agrupado = df_nc_agrupado[column_order_nc]
-    df_otros_agrupado = df_otros_agrupado[column_order_otros]
 
-    # Limpiar columnas innecesarias
-    df_nc_agrupado = df_nc_agrupado.drop(
-        columns=["Concepto_original", "idx_original"], errors="ignore"
-    )
-    df_otros_agrupado = df_otros_agrupado.drop(
-        columns=["Concepto_original", "idx_original"], errors="ignore"
+def mostrar_descarga_excel(df_movimientos, file_id, diagnostico=None):
+    """Botón para generar y descargar el Excel de movimientos"""
+    mostrar_descarga_diferida(
+        f"excel_{file_id}",
+        lambda: excel_en_bytes(df_movimientos),
+        "Excel",
+        "📊 Preparar movimientos en Excel",
+        "Genera el archivo Excel con formato de moneda (en libros grandes puede tardar)",
+        "movimientos.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filas=len(df_movimientos),
+        diagnostico=diagnostico,
     )
 
-    # Redondear valores numéricos a 2 decimales para evitar problemas de precisión
-    # Usar formateo forzado para eliminar completamente los errores de punto flotante
-    columnas_numericas = [
-        "Monto Neto Gravado",
-        "Debito Fiscal Facturado",
-        "Debito Fiscal O.D.P.",
-        "Monto Neto Exento o No Gravado",
-    ]
-
-    for col in columnas_numericas:
-        if col in df_nc_agrupado.columns:
-            # Aplicar redondeo agresivo final para eliminar errores de precisión
-            df_nc_agrupado[col] = df_nc_agrupado[col].apply(redondear_agresivo)
-        if col in df_otros_agrupado.columns:
-            df_otros_agrupado[col] = df_otros_agrupado[col].apply(redondear_agresivo)
-
-    # Reemplazar ceros numéricos por cadenas vacías
-    df_nc_agrupado = df_nc_agrupado.map(
-        lambda x: "" if isinstance(x, (int, float)) and x == 0 else x
-    )
-    df_otros_agrupado = df_otros_agrupado.map(
-        lambda x: "" if isinstance(x, (int, float)) and x == 0 else x
-    )
 
-    # Crear nombres únicos para los archivos
-    timestamp = int(time.time())
-    nombre_nc = f"archivo_rf_{timestamp}.csv"
-    nombre_otros = f"archivo_df_{timestamp}.csv"
-
-    # Exportar sin comillas en los valores
-    df_nc_agrupado.to_csv(
-        nombre_nc,
-        index=False,
-        sep=";",
-        decimal=",",
-        encoding="latin1",
-        quoting=csv.QUOTE_NONE,
-        float_format="%.2f",
+def mostrar_descarga_parquet(
+    df_movimientos, encabezado, file_id, compras_o_ventas, diagnostico=None
+):
+    """Botón para generar y descargar el Parquet de movimientos"""
+    mostrar_descarga_diferida(
+        f"parquet_{file_id}",
+        lambda: movimientos_a_parquet(
+            df_movimientos,
+            encabezado,
+            clave=file_id,
+            compras_o_ventas=compras_o_ventas,
+        ),
+        "Parquet",
+        "🗃️ Preparar movimientos en Parquet",
+        "Movimientos en formato columnar, para análisis sin volver a parsear el TXT",
+        "movimientos.parquet",
+        "application/octet-stream",
+        ayuda_descarga="Movimientos con montos en centavos y el encabezado del libro en los metadatos",
+        filas=len(df_movimientos),
+        diagnostico=diagnostico,
     )
-    df_otros_agrupado.to_csv(
-        nombre_otros,
-        index=False,
-        sep=";",
-        decimal=",",
-        encoding="latin1",
-        quoting=csv.QUOTE_NONE,
-        float_format="%.2f",
-    )
-
-    # Función para poner comillas solo en el header
-    def poner_comillas_header(nombre_archivo):
-        with open(nombre_archivo, "r", encoding="latin1") as f:
-            lineas = f.readlines()
 
-        header = lineas[0].strip().split(";")
-        header_comillas = ['"{}"'.format(col) for col in header]
-        lineas[0] = ";".join(header_comillas) + "\n"
 
-        with open(nombre_archivo, "w", encoding="latin1") as f:
-            f.writelines(lineas)
-
-    # Aplicar a ambos archivos
-    poner_comillas_header(nombre_nc)
-    poner_comillas_header(nombre_otros)
+def mostrar_generacion_arca(
+    df_movimientos,
+    file_id,
+    diagnostico=None,
+    sufijo_csv="",
+    compras_o_ventas="Ventas",
+):
+    """Asignación de actividades por concepto, generación y descarga de los CSV para ARCA"""
+    archivo_nc, archivo_otros = formato_arca(compras_o_ventas)["archivos"]
+
+    # Obtener conceptos únicos automáticamente (solo una vez por archivo; file_id
+    # ya identifica el contenido, el tipo y las opciones)
+    if f"conceptos_{file_id}" not in st.session_state:
+        with st.spinner("Analizando conceptos del archivo..."):
+            conceptos_unicos = obtener_conceptos_unicos(df_movimientos)
+            st.session_state[f"conceptos_{file_id}"] = conceptos_unicos
+    else:
+        conceptos_unicos = st.session_state[f"conceptos_{file_id}"]
 
-    return nombre_nc, nombre_otros, df_nc_agrupado, df_otros_agrupado
+    if conceptos_unicos:
+        st.success(
+            f"✅ Se encontraron {len(conceptos_unicos)} conceptos únicos"
+        )
 
+        st.write("**Asignación de códigos de actividad por concepto:**")
+        st.caption(
+            "Para cada concepto encontrado en el archivo, asigna el código de actividad correspondiente."
+        )
 
-# ============================================================================
-# FUNCIONES DE EXCEL
-# ============================================================================
+        # Crear inputs para cada concepto dentro de un formulario: escribir un
+        # código no dispara un rerun, los valores se envían juntos con el botón
+        # Usar columnas para organizar mejor los inputs
+        num_conceptos = len(conceptos_unicos)
+        cols_per_row = 3
+
+        with st.form(f"actividades_{file_id}"):
+            st.write("Completa todos los campos antes de generar los archivos:")
+
+            for i in range(0, num_conceptos, cols_per_row):
+                cols = st.columns(cols_per_row)
+                for j, concepto in enumerate(
+                    conceptos_unicos[i : i + cols_per_row]
+                ):
+                    with cols[j]:
+                        # Formatear concepto solo para mostrar (quitar .0 visual)
+                        concepto_display = formatear_concepto_para_display(concepto)
+                        st.text_input(
+                            f"Concepto {concepto_display}:",
+                            key=f"concepto_{concepto}",  # Usar concepto original como key
+                            help=f"Ingresa el código de actividad para el concepto {concepto_display}",
+                        )
 
+            # Botón para generar archivos CSV
+            generar = st.form_submit_button(
+                "🔄 Generar Archivos CSV para ARCA", type="primary"
+            )
 
-def crear_archivo_excel(df_final):
-    """Crea el archivo Excel solo con la hoja de movimientos"""
-    import time
+        if generar:
+            # Construir el diccionario solo cuando se hace click en el botón
+            actividad_por_concepto = {}
+            for concepto in conceptos_unicos:
+                codigo = st.session_state.get(f"concepto_{concepto}", "")
+                if codigo.strip():
+                    actividad_por_concepto[concepto] = codigo.strip()
+            # Validar que todos los conceptos tengan código asignado
+            conceptos_sin_codigo = [
+                c
+                for c in conceptos_unicos
+                if c not in actividad_por_concepto
+                or not actividad_por_concepto[c]
+            ]
+
+            if conceptos_sin_codigo:
+                st.error(
+                    f"❌ **Error**: Faltan códigos de actividad para los conceptos: {', '.join(conceptos_sin_codigo)}"
+                )
+            elif (
+                st.session_state.get(f"csv_data_{file_id}", {}).get(
+                    "actividad_por_concepto"
+                )
+                == actividad_por_concepto
+            ):
+                # Mismos códigos que la última generación: los CSV ya están listos
+                st.info(
+                    "ℹ️ Los archivos CSV ya están generados con estos códigos de actividad."
+                )
+            else:
+                with st.spinner("Procesando datos para ARCA..."):
+                    try:
+                        # Los montos por concepto y alícuota se suman una sola
+                        # vez por archivo; cambiar actividades solo reetiqueta
+                        inicio = iniciar_medicion(diagnostico)
+                        if f"preagregado_{file_id}" not in st.session_state:
+                            st.session_state[f"preagregado_{file_id}"] = (
+                                preagregar_arca(df_movimientos, compras_o_ventas)
+                            )
+                            inicio = registrar_tiempo(
+                                diagnostico,
+                                "arca_preagregado",
+                                inicio,
+                                len(st.session_state[f"preagregado_{file_id}"]),
+                            )
+                        df_salida = asignar_actividades_arca(
+                            st.session_state[f"preagregado_{file_id}"],
+                            actividad_por_concepto,
+                        )
 
-    timestamp = int(time.time())
-    excel_filename = f"Movimientos_{timestamp}.xlsx"
+                        # Generar el contenido de los archivos CSV
+                        (
+                            csv_nc,
+                            csv_otros,
+                            df_nc_agrupado,
+                            df_otros_agrupado,
+                        ) = generar_archivos_csv_arca(df_salida, compras_o_ventas)
+                        registrar_tiempo(
+                            diagnostico,
+                            "arca_csv",
+                            inicio,
+                            len(df_nc_agrupado) + len(df_otros_agrupado),
+                        )
 
-    with pd.ExcelWriter(excel_filename, engine="openpyxl") as writer:
-        # Solo hoja Movimientos - empezando desde la fila 1
-        df_final.to_excel(writer, sheet_name="Movimientos", index=False)
+                        # Almacenar datos CSV en session_state para que persistan
+                        csv_data_nc = csv_nc if len(df_nc_agrupado) > 0 else None
+                        csv_data_otros = (
+                            csv_otros if len(df_otros_agrupado) > 0 else None
+                        )
 
-    return excel_filename
+                        st.session_state[f"csv_data_{file_id}"] = {
+                            "df_nc_agrupado": df_nc_agrupado,
+                            "df_otros_agrupado": df_otros_agrupado,
+                            "csv_data_nc": csv_data_nc,
+                            "csv_data_otros": csv_data_otros,
+                            "actividad_por_concepto": actividad_por_concepto,
+                            "generated": True,
+                        }
+
+                        st.success("✅ ¡Archivos CSV generados correctamente!")
+
+                        # Mostrar estadísticas
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric(
+                                "📋 Notas de Crédito",
+                                len(df_nc_agrupado),
+                            )
+                        with col2:
+                            st.metric(
+                                "📄 Otros Comprobantes",
+                                len(df_otros_agrupado),
+                            )
 
+                    except Exception as e:
+                        st.error(f"❌ Error al generar archivos CSV: {e}")
+
+                    finally:
+                        if diagnostico is not None:
+                            diagnostico.finalizar()
+
+        # Mostrar botones de descarga si ya se generaron los CSV
+        if f"csv_data_{file_id}" in st.session_state and st.session_state[
+            f"csv_data_{file_id}"
+        ].get("generated", False):
+            csv_data = st.session_state[f"csv_data_{file_id}"]
+            df_nc_agrupado = csv_data["df_nc_agrupado"]
+            df_otros_agrupado = csv_data["df_otros_agrupado"]
+
+            # Botones de descarga
+            st.subheader("📥 Descargar Archivos CSV")
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                if csv_data["csv_data_nc"] is not None:
+                    st.download_button(
+                        label=f"📋 Descargar {archivo_nc}{sufijo_csv}.csv (Notas de Crédito)",
+                        data=csv_data["csv_data_nc"],
+                        file_name=f"{archivo_nc}{sufijo_csv}.csv",
+                        mime="text/csv",
+                    )
+                else:
+                    st.info("No hay notas de crédito para descargar")
+
+            with col2:
+                if csv_data["csv_data_otros"] is not None:
+                    st.download_button(
+                        label=f"📄 Descargar {archivo_otros}{sufijo_csv}.csv (Otros Comprobantes)",
+                        data=csv_data["csv_data_otros"],
+                        file_name=f"{archivo_otros}{sufijo_csv}.csv",
+                        mime="text/csv",
+                    )
+                else:
+                    st.info("No hay otros comprobantes para descargar")
 
-def aplicar_formulas_excel(excel_filename, df_final):
-    """Aplica formato de moneda en la hoja de movimientos, sin agregar ninguna fórmula de suma."""
-    wb = load_workbook(excel_filename)
-    wm = wb["Movimientos"]
+            # Mostrar preview de los datos
+            st.subheader("👀 Vista Previa de los Datos")
 
-    # La tabla ahora empieza desde la fila 1 (fila 2 considerando el encabezado)
-    inicio_fila_movimientos = 2  # Fila 1 es el encabezado, datos empiezan en fila 2
-    ultima_fila_movimientos = inicio_fila_movimientos + df_final.shape[0] - 1
+            tab1, tab2 = st.tabs(
+                [
+                    "📋 Notas de Crédito",
+                    "📄 Otros Comprobantes",
+                ]
+            )
 
-    # Aplicar formato de moneda a todas las columnas numéricas (desde columna 11 en adelante)
-    for col_idx in range(11, df_final.shape[1] + 1):
-        col_letter = get_column_letter(col_idx)
-        for row_idx in range(
-            inicio_fila_movimientos, ultima_fila_movimientos + 1
-        ):  # Formatear solo las filas de datos
-            cell = wm[f"{col_letter}{row_idx}"]
-            cell.number_format = '"$"#,##0.00'
+            with tab1:
+                if len(df_nc_agrupado) > 0:
+                    st.dataframe(
+                        df_nc_agrupado,
+                        use_container_width=True,
+                    )
+                else:
+                    st.info("No hay notas de crédito en este archivo.")
+
+            with tab2:
+                if len(df_otros_agrupado) > 0:
+                    st.dataframe(
+                        df_otros_agrupado,
+                        use_container_width=True,
+                    )
+                else:
+                    st.info("No hay otros comprobantes en este archivo.")
 
-    wb.save(excel_filename)
+    else:
+        st.warning(
+            "⚠️ No se encontraron conceptos únicos en el archivo para procesar."
+        )
 
 
-# ============================================================================
-# FUNCIÓN PRINCIPAL
-# ============================================================================
+def mostrar_varios_archivos(uploaded_files, tipo_movimiento, combinar_no_consecutivos):
+    """Procesa varios archivos en paralelo y muestra la vista consolidada"""
+    file_ids = [
+        clave_archivo_subido(uploaded_file, tipo_movimiento, combinar_no_consecutivos)
+        for uploaded_file in uploaded_files
+    ]
 
+    # Los archivos ya procesados (en esta sesión o en la caché) no se reprocesan
+    cache_resultados = obtener_cache_resultados()
+    pendientes = []
+    for uploaded_file, file_id in zip(uploaded_files, file_ids):
+        if f"processed_{file_id}" in st.session_state:
+            continue
+        resultado_cache = cache_resultados.obtener(file_id)
+        if resultado_cache is not None:
+            st.session_state[f"processed_{file_id}"] = True
+            st.session_state[f"excel_{file_id}"] = None
+            st.session_state[f"df_{file_id}"] = resultado_cache[0]
+            st.session_state[f"encabezado_{file_id}"] = resultado_cache[1]
+        else:
+            pendientes.append((uploaded_file, file_id))
+
+    if pendientes:
+        with st.spinner(f"Procesando {len(pendientes)} archivos en paralelo..."):
+            resultados = parsear_archivos_en_paralelo(
+                [uploaded_file.getvalue() for uploaded_file, _ in pendientes],
+                tipo_movimiento,
+                combinar_no_consecutivos,
+                montos_dispersos=montos_dispersos_activados(),
+            )
 
-def procesar_archivo(file_path, tipo_esperado=None):
-    """Función principal que procesa el archivo completo"""
-    try:
-        # 1. Leer y limpiar archivo
-        lines = leer_archivo(file_path)
-        encabezado_completo = procesar_encabezado(lines)
-        cleaned_lines, compras_o_ventas = limpiar_lineas(lines)
+        for (uploaded_file, file_id), (resultado, error) in zip(
+            pendientes, resultados
+        ):
+            df_movimientos = encabezado = None
+            if error is None:
+                df_movimientos, encabezado, _ = resultado
+                cache_resultados.guardar(file_id, df_movimientos, encabezado)
+            else:
+                st.session_state[f"error_{file_id}"] = mensaje_error_archivo(error)
+            st.session_state[f"processed_{file_id}"] = True
+            st.session_state[f"excel_{file_id}"] = None
+            st.session_state[f"df_{file_id}"] = df_movimientos
+            st.session_state[f"encabezado_{file_id}"] = encabezado
 
-        # 2. Validar que el tipo de archivo coincida con la selección
-        if tipo_esperado and compras_o_ventas and compras_o_ventas != tipo_esperado:
+    correctos = []
+    for uploaded_file, file_id in zip(uploaded_files, file_ids):
+        if st.session_state[f"df_{file_id}"] is None:
             st.error(
-                f"❌ **Error de validación**: El archivo contiene movimientos de **{compras_o_ventas}** pero seleccionaste **{tipo_esperado}**. Por favor, verifica tu selección o sube el archivo correcto."
+                f"**{uploaded_file.name}**: "
+                + st.session_state.get(f"error_{file_id}", "Error al procesar el archivo")
             )
-            return None, None, None
-
-        if not compras_o_ventas:
-            st.warning(
-                "⚠️ No se pudo detectar automáticamente el tipo de movimientos en el archivo. Continuando con el procesamiento..."
-            )
-            compras_o_ventas = tipo_esperado  # Usar el tipo seleccionado por el usuario
-        doble_cleaned_lines = limpiar_lineas_adicional(cleaned_lines)
+        else:
+            correctos.append((uploaded_file, file_id))
 
-        # 3. Procesar movimientos
-        movements = procesar_movimientos(doble_cleaned_lines, compras_o_ventas)
+    if not correctos:
+        return
 
-        # 4. Crear DataFrames
-        df = crear_dataframe_movimientos(movements)
-        df_final = combinar_movimientos_duplicados(df)
-        df_final = agregar_totales_movimientos(df_final)
+    st.success(
+        f"✅ {len(correctos)} de {len(uploaded_files)} archivos procesados correctamente!"
+    )
 
-        # Forzar tipo numérico en columnas desde la 11 en adelante
-        for col in df_final.columns[11:]:
-            df_final[col] = (
-                pd.to_numeric(df_final[col], errors="coerce").fillna(0).astype(float)
-            )
+    # Resumen por archivo
+    st.subheader("📋 Archivos Procesados")
+    filas_resumen = []
+    for uploaded_file, file_id in correctos:
+        df_movimientos = st.session_state[f"df_{file_id}"]
+        encabezado = st.session_state[f"encabezado_{file_id}"]
+        filas_resumen.append(
+            {
+                "Archivo": uploaded_file.name,
+                "Razón Social": encabezado.get("RAZON SOCIAL", "N/A"),
+                "CUIT": encabezado.get("CUIT", "N/A"),
+                "Período": encabezado.get("PERIODO", "N/A"),
+                "Registros": len(df_movimientos),
+                "Total": df_movimientos["Total"].sum() / 100
+                if "Total" in df_movimientos.columns
+                else 0.0,
+            }
+        )
+    st.dataframe(
+        pd.DataFrame(filas_resumen), use_container_width=True, hide_index=True
+    )
 
-        # 5. Crear archivo Excel (sin la fila de totales)
-        df_final_sin_totales = df_final[df_final["Nro"] != "TOTALES"].copy()
-
-        # Forzar tipo float en todas las columnas numéricas posteriores a 'Jurisdiccion'
-        idx_jurisdiccion = df_final_sin_totales.columns.get_loc("Jurisdiccion")
-        for col in df_final_sin_totales.columns[idx_jurisdiccion + 1 :]:
-            df_final_sin_totales[col] = (
-                df_final_sin_totales[col]
-                .astype(str)
-                .str.replace(",", ".", regex=False)
-                .str.replace(" ", "", regex=False)
-            )
-            df_final_sin_totales[col] = (
-                pd.to_numeric(df_final_sin_totales[col], errors="coerce")
-                .fillna(0)
-                .astype(float)
+    # Movimientos de todos los archivos, etiquetados con su PERIODO y CUIT
+    clave_consolidado = hashlib.sha256(
+        "|".join(file_id for _, file_id in correctos).encode()
+    ).hexdigest()
+    if f"df_consolidado_{clave_consolidado}" not in st.session_state:
+        st.session_state[f"df_consolidado_{clave_consolidado}"] = (
+            combinar_dataframes_archivos(
+                [st.session_state[f"df_{file_id}"] for _, file_id in correctos],
+                [st.session_state[f"encabezado_{file_id}"] for _, file_id in correctos],
             )
+        )
+    df_consolidado = st.session_state[f"df_consolidado_{clave_consolidado}"]
+
+    st.subheader("📊 Resumen Consolidado")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Archivos", len(correctos))
+    with col2:
+        st.metric("Total de Registros", len(df_consolidado))
+    with col3:
+        if "Total" in df_consolidado.columns:
+            st.metric("Total General", f"${df_consolidado['Total'].sum() / 100:,.2f}")
+
+    st.subheader("🧾 Movimientos Consolidados")
+    # La conversión a pesos para mostrar se hace una vez, no en cada rerun
+    if f"df_consolidado_pesos_{clave_consolidado}" not in st.session_state:
+        st.session_state[f"df_consolidado_pesos_{clave_consolidado}"] = (
+            centavos_a_pesos(df_consolidado)
+        )
+    st.dataframe(
+        st.session_state[f"df_consolidado_pesos_{clave_consolidado}"],
+        use_container_width=True,
+        hide_index=True,
+    )
 
-        excel_filename = crear_archivo_excel(df_final_sin_totales)
-
-        # 6. Aplicar formato
-        aplicar_formulas_excel(excel_filename, df_final_sin_totales)
-
-        st.success("¡Archivo procesado con éxito!")
-        return excel_filename, df_final_sin_totales, encabezado_completo
-
-    except Exception as e:
-        st.error(f"Error al procesar el archivo: {e}")
-        return None, None, None
-
-
-# ============================================================================
-# INTERFAZ DE STREAMLIT
-# ============================================================================
+    st.subheader("🏛️ Generar Archivos para ARCA (Consolidado)")
+    if formato_arca(tipo_movimiento) is not None:
+        st.info(
+            f"💡 **Información**: Los CSV consolidados agrupan las {tipo_movimiento.lower()} de todos los archivos por **Periodo** y **CUIT Libro** además de los campos de ARCA, para revisar varios libros juntos. Para presentar cada período en ARCA, sube su archivo por separado."
+        )
+        mostrar_generacion_arca(
+            df_consolidado,
+            f"consolidado_{clave_consolidado}",
+            sufijo_csv="_consolidado",
+            compras_o_ventas=tipo_movimiento,
+        )
+    else:
+        st.warning(
+            "🚧 **En Desarrollo**: La funcionalidad para procesar archivos de COMPRAS estará disponible próximamente."
+        )
 
 
 def main():
@@ -772,43 +593,88 @@ def main():
 
     st.markdown("---")
 
-    # Subir archivo TXT
-    uploaded_file = st.file_uploader(
-        f"Selecciona el archivo de movimientos IVA - {tipo_movimiento}",
+    # Subir archivos TXT (uno o varios)
+    uploaded_files = st.file_uploader(
+        f"Selecciona los archivos de movimientos IVA - {tipo_movimiento}",
         type=["txt"],
-        help=f"Sube un archivo de texto con los movimientos IVA de {tipo_movimiento.lower()}",
+        accept_multiple_files=True,
+        help=f"Sube uno o más archivos de texto con los movimientos IVA de {tipo_movimiento.lower()} (por ejemplo, los doce meses de un año)",
+    )
+
+    combinar_no_consecutivos = st.checkbox(
+        "Combinar comprobantes repetidos aunque no estén en filas consecutivas",
+        help="Útil cuando un salto de página parte un comprobante en dos bloques separados",
+    )
+
+    mostrar_diagnostico = st.checkbox(
+        "Registrar diagnóstico de rendimiento",
+        help="Mide el tiempo, las filas y la memoria de cada etapa del procesamiento (el rastreo de memoria hace más lento el procesamiento)",
     )
 
-    if uploaded_file is None:
-        st.info("👆 Sube un archivo TXT para comenzar")
+    if not uploaded_files:
+        st.info("👆 Sube uno o más archivos TXT para comenzar")
         st.stop()
 
-    # Crear ID único del archivo para cachear el procesamiento
-    file_id = f"{uploaded_file.name}_{uploaded_file.size}_{tipo_movimiento}_{hash(uploaded_file.getvalue())}"
+    if len(uploaded_files) > 1:
+        mostrar_varios_archivos(
+            uploaded_files, tipo_movimiento, combinar_no_consecutivos
+        )
+        return
+
+    uploaded_file = uploaded_files[0]
+
+    # Crear ID del contenido del archivo para cachear el procesamiento
+    file_id = clave_archivo_subido(
+        uploaded_file, tipo_movimiento, combinar_no_consecutivos
+    )
 
     # Solo procesar si no está en session_state
     if f"processed_{file_id}" not in st.session_state:
-        # Guardar archivo temporalmente
-        with open("temp_file.txt", "wb") as f:
-            f.write(uploaded_file.getbuffer())
-
-        with st.spinner("Procesando archivo..."):
-            # Procesar archivo TXT
-            excel_filename, df_movimientos, encabezado = procesar_archivo(
-                "temp_file.txt", tipo_movimiento
+        diagnostico = None
+        if mostrar_diagnostico:
+            diagnostico = Diagnostico(
+                memoria=True,
+                contexto={"archivo": uploaded_file.name, "tipo": tipo_movimiento},
             )
 
-            # Almacenar resultados en session_state
-            st.session_state[f"processed_{file_id}"] = True
-            st.session_state[f"excel_{file_id}"] = excel_filename
-            st.session_state[f"df_{file_id}"] = df_movimientos
-            st.session_state[f"encabezado_{file_id}"] = encabezado
+        cache_resultados = obtener_cache_resultados()
+        inicio = iniciar_medicion(diagnostico)
+        resultado_cache = cache_resultados.obtener(file_id)
+
+        if resultado_cache is not None:
+            # Mismo contenido ya procesado en esta u otra sesión
+            df_movimientos, encabezado = resultado_cache
+            registrar_tiempo(diagnostico, "cache", inicio, len(df_movimientos))
+        else:
+            with st.spinner("Procesando archivo..."):
+                # Procesar archivo TXT directamente desde memoria
+                df_movimientos, encabezado = procesar_archivo(
+                    uploaded_file,
+                    tipo_movimiento,
+                    combinar_no_consecutivos,
+                    diagnostico,
+                )
+            if df_movimientos is not None:
+                cache_resultados.guardar(file_id, df_movimientos, encabezado)
+
+        if diagnostico is not None:
+            diagnostico.finalizar()
+        st.session_state[f"diagnostico_{file_id}"] = diagnostico
+
+        # Almacenar resultados en session_state
+        st.session_state[f"processed_{file_id}"] = True
+        st.session_state[f"excel_{file_id}"] = None
+        st.session_state[f"df_{file_id}"] = df_movimientos
+        st.session_state[f"encabezado_{file_id}"] = encabezado
     else:
         # Recuperar resultados del session_state
-        excel_filename = st.session_state[f"excel_{file_id}"]
         df_movimientos = st.session_state[f"df_{file_id}"]
         encabezado = st.session_state[f"encabezado_{file_id}"]
 
+    diagnostico = (
+        st.session_state.get(f"diagnostico_{file_id}") if mostrar_diagnostico else None
+    )
+
     if df_movimientos is not None:
         st.success("✅ Archivo procesado correctamente!")
 
@@ -834,244 +700,33 @@ def main():
             st.metric("Total de Registros", len(df_movimientos))
 
         with col2:
-            # Contar comprobantes únicos (excluyendo TOTALES)
-            df_sin_totales = df_movimientos[df_movimientos["Nro"] != "TOTALES"]
-            comprobantes_unicos = len(df_sin_totales)
-            st.metric("Comprobantes Únicos", comprobantes_unicos)
+            # Los movimientos ya vienen combinados y sin fila de totales
+            st.metric("Comprobantes Únicos", len(df_movimientos))
 
         with col3:
-            # Calcular total general (excluyendo fila de totales)
             if "Total" in df_movimientos.columns:
-                total_general = df_movimientos[df_movimientos["Nro"] != "TOTALES"][
-                    "Total"
-                ].sum()
+                total_general = df_movimientos["Total"].sum() / 100
                 st.metric("Total General", f"${total_general:,.2f}")
 
+        mostrar_descarga_parquet(
+            df_movimientos, encabezado, file_id, tipo_movimiento, diagnostico
+        )
+        mostrar_descarga_excel(df_movimientos, file_id, diagnostico)
+
                 # ========================================================================
         # SECCIÓN PARA GENERAR ARCHIVOS CSV PARA ARCA
         # ========================================================================
 
         st.subheader("🏛️ Generar Archivos para ARCA")
 
-        if tipo_movimiento == "Ventas":
+        if formato_arca(tipo_movimiento) is not None:
             st.info(
-                "💡 **Información**: Esta sección te permite generar los archivos CSV necesarios para la presentación en ARCA, basados en los datos procesados del archivo TXT de **VENTAS**."
+                f"💡 **Información**: Esta sección te permite generar los archivos CSV necesarios para la presentación en ARCA, basados en los datos procesados del archivo TXT de **{tipo_movimiento.upper()}**."
             )
 
-            # Obtener conceptos únicos automáticamente (solo una vez por archivo)
-            archivo_id = f"{tipo_movimiento}_{len(df_movimientos)}_{hash(str(df_movimientos.iloc[0].values.tobytes()) if len(df_movimientos) > 0 else 'empty')}"
-
-            if f"conceptos_{archivo_id}" not in st.session_state:
-                with st.spinner("Analizando conceptos del archivo..."):
-                    conceptos_unicos = obtener_conceptos_unicos(df_movimientos)
-                    st.session_state[f"conceptos_{archivo_id}"] = conceptos_unicos
-            else:
-                conceptos_unicos = st.session_state[f"conceptos_{archivo_id}"]
-
-            if conceptos_unicos:
-                st.success(
-                    f"✅ Se encontraron {len(conceptos_unicos)} conceptos únicos"
-                )
-
-                st.write("**Asignación de códigos de actividad por concepto:**")
-                st.caption(
-                    "Para cada concepto encontrado en el archivo, asigna el código de actividad correspondiente."
-                )
-
-                # Crear inputs para cada concepto
-                # Usar columnas para organizar mejor los inputs
-                num_conceptos = len(conceptos_unicos)
-                cols_per_row = 3
-
-                st.write("Completa todos los campos antes de generar los archivos:")
-
-                for i in range(0, num_conceptos, cols_per_row):
-                    cols = st.columns(cols_per_row)
-                    for j, concepto in enumerate(
-                        conceptos_unicos[i : i + cols_per_row]
-                    ):
-                        with cols[j]:
-                            # Formatear concepto solo para mostrar (quitar .0 visual)
-                            concepto_display = formatear_concepto_para_display(concepto)
-                            st.text_input(
-                                f"Concepto {concepto_display}:",
-                                key=f"concepto_{concepto}",  # Usar concepto original como key
-                                help=f"Ingresa el código de actividad para el concepto {concepto_display}",
-                            )
-
-                # Botón para generar archivos CSV
-                if st.button("🔄 Generar Archivos CSV para ARCA", type="primary"):
-                    # Construir el diccionario solo cuando se hace click en el botón
-                    actividad_por_concepto = {}
-                    for concepto in conceptos_unicos:
-                        codigo = st.session_state.get(f"concepto_{concepto}", "")
-                        if codigo.strip():
-                            actividad_por_concepto[concepto] = codigo.strip()
-                    # Validar que todos los conceptos tengan código asignado
-                    conceptos_sin_codigo = [
-                        c
-                        for c in conceptos_unicos
-                        if c not in actividad_por_concepto
-                        or not actividad_por_concepto[c]
-                    ]
-
-                    if conceptos_sin_codigo:
-                        st.error(
-                            f"❌ **Error**: Faltan códigos de actividad para los conceptos: {', '.join(conceptos_sin_codigo)}"
-                        )
-                    else:
-                        with st.spinner("Procesando datos para ARCA..."):
-                            try:
-                                # Procesar DataFrame
-                                df_salida = procesar_dataframe_para_arca(
-                                    df_movimientos, actividad_por_concepto
-                                )
-
-                                # Generar archivos CSV
-                                (
-                                    nombre_nc,
-                                    nombre_otros,
-                                    df_nc_agrupado,
-                                    df_otros_agrupado,
-                                ) = generar_archivos_csv_arca(df_salida)
-
-                                # Almacenar datos CSV en session_state para que persistan
-                                csv_data_nc = None
-                                csv_data_otros = None
-
-                                if len(df_nc_agrupado) > 0:
-                                    with open(nombre_nc, "rb") as f:
-                                        csv_data_nc = f.read()
-
-                                if len(df_otros_agrupado) > 0:
-                                    with open(nombre_otros, "rb") as f:
-                                        csv_data_otros = f.read()
-
-                                st.session_state[f"csv_data_{file_id}"] = {
-                                    "df_nc_agrupado": df_nc_agrupado,
-                                    "df_otros_agrupado": df_otros_agrupado,
-                                    "csv_data_nc": csv_data_nc,
-                                    "csv_data_otros": csv_data_otros,
-                                    "generated": True,
-                                }
-
-                                st.success("✅ ¡Archivos CSV generados correctamente!")
-
-                                # Mostrar estadísticas
-                                col1, col2 = st.columns(2)
-                                with col1:
-                                    st.metric(
-                                        "📋 Notas de Crédito",
-                                        len(df_nc_agrupado),
-                                    )
-                                with col2:
-                                    st.metric(
-                                        "📄 Otros Comprobantes",
-                                        len(df_otros_agrupado),
-                                    )
-
-                            except Exception as e:
-                                st.error(f"❌ Error al generar archivos CSV: {e}")
-
-                # Mostrar botones de descarga si ya se generaron los CSV
-                if f"csv_data_{file_id}" in st.session_state and st.session_state[
-                    f"csv_data_{file_id}"
-                ].get("generated", False):
-                    csv_data = st.session_state[f"csv_data_{file_id}"]
-                    df_nc_agrupado = csv_data["df_nc_agrupado"]
-                    df_otros_agrupado = csv_data["df_otros_agrupado"]
-
-                    # Botones de descarga
-                    st.subheader("📥 Descargar Archivos CSV")
-
-                    col1, col2 = st.columns(2)
-
-                    with col1:
-                        if csv_data["csv_data_nc"] is not None:
-                            st.download_button(
-                                label="📋 Descargar archivo_rf.csv (Notas de Crédito)",
-                                data=csv_data["csv_data_nc"],
-                                file_name="archivo_rf.csv",
-                                mime="text/csv",
-                            )
-                        else:
-                            st.info("No hay notas de crédito para descargar")
-
-                    with col2:
-                        if csv_data["csv_data_otros"] is not None:
-                            st.download_button(
-                                label="📄 Descargar archivo_df.csv (Otros Comprobantes)",
-                                data=csv_data["csv_data_otros"],
-                                file_name="archivo_df.csv",
-                                mime="text/csv",
-                            )
-                        else:
-                            st.info("No hay otros comprobantes para descargar")
-
-                    # Mostrar preview de los datos
-                    st.subheader("👀 Vista Previa de los Datos")
-
-                    tab1, tab2 = st.tabs(
-                        [
-                            "📋 Notas de Crédito",
-                            "📄 Otros Comprobantes",
-                        ]
-                    )
-
-                    with tab1:
-                        if len(df_nc_agrupado) > 0:
-                            # Crear copia formateada para mostrar
-                            df_nc_display = df_nc_agrupado.copy()
-                            for col in [
-                                "Monto Neto Gravado",
-                                "Debito Fiscal Facturado",
-                                "Debito Fiscal O.D.P.",
-                                "Monto Neto Exento o No Gravado",
-                            ]:
-                                if col in df_nc_display.columns:
-                                    df_nc_display[col] = df_nc_display[col].apply(
-                                        lambda x: (
-                                            f"{redondear_agresivo(x):.2f}"
-                                            if pd.notnull(x) and x != 0 and x != ""
-                                            else x
-                                        )
-                                    )
-                            st.dataframe(
-                                df_nc_display,
-                                use_container_width=True,
-                            )
-                        else:
-                            st.info("No hay notas de crédito en este archivo.")
-
-                    with tab2:
-                        if len(df_otros_agrupado) > 0:
-                            # Crear copia formateada para mostrar
-                            df_otros_display = df_otros_agrupado.copy()
-                            for col in [
-                                "Monto Neto Gravado",
-                                "Debito Fiscal Facturado",
-                                "Debito Fiscal O.D.P.",
-                                "Monto Neto Exento o No Gravado",
-                            ]:
-                                if col in df_otros_display.columns:
-                                    df_otros_display[col] = df_otros_display[col].apply(
-                                        lambda x: (
-                                            f"{redondear_agresivo(x):.2f}"
-                                            if pd.notnull(x) and x != 0 and x != ""
-                                            else x
-                                        )
-                                    )
-                            st.dataframe(
-                                df_otros_display,
-                                use_container_width=True,
-                            )
-                        else:
-                            st.info("No hay otros comprobantes en este archivo.")
-
-            else:
-                st.warning(
-                    "⚠️ No se encontraron conceptos únicos en el archivo para procesar."
-                )
+            mostrar_generacion_arca(
+                df_movimientos, file_id, diagnostico, compras_o_ventas=tipo_movimiento
+            )
 
         elif tipo_movimiento == "Compras":
             st.info(
@@ -1094,42 +749,30 @@ def main():
         else:
             st.error("❌ Tipo de movimiento no reconocido")
 
+        # Diagnóstico de rendimiento
+        if mostrar_diagnostico:
+            with st.expander("🩺 Diagnóstico de rendimiento"):
+                if diagnostico is None or not diagnostico.etapas:
+                    st.info(
+                        "Este archivo se procesó sin el diagnóstico activado."
+                    )
+                else:
+                    df_diagnostico = pd.DataFrame(diagnostico.etapas)
+                    if "pico_bytes" in df_diagnostico.columns:
+                        df_diagnostico["pico_mib"] = (
+                            df_diagnostico.pop("pico_bytes") / 2**20
+                        ).round(2)
+                    st.dataframe(df_diagnostico, use_container_width=True)
+                    st.download_button(
+                        label="📥 Descargar diagnóstico (JSON lines)",
+                        data=diagnostico.a_json_lines(),
+                        file_name="diagnostico.jsonl",
+                        mime="application/json",
+                    )
+
     else:
         st.error("❌ Error al procesar el archivo")
 
-    # Limpiar archivos temporales
-
-    try:
-        if os.path.exists("temp_file.txt"):
-            os.remove("temp_file.txt")
-    except PermissionError:
-        pass  # Ignorar si el archivo está siendo usado
-
-    # Limpiar archivos Excel temporales generados
-    try:
-        for archivo in glob.glob("Movimientos_*.xlsx"):
-            try:
-                os.remove(archivo)
-            except PermissionError:
-                pass  # Ignorar si está siendo usado por Excel
-    except Exception:
-        pass
-
-    # Limpiar archivos CSV temporales generados
-    try:
-        for archivo in glob.glob("archivo_rf_*.csv"):
-            try:
-                os.remove(archivo)
-            except PermissionError:
-                pass  # Ignorar si está siendo usado
-        for archivo in glob.glob("archivo_df_*.csv"):
-            try:
-                os.remove(archivo)
-            except PermissionError:
-                pass  # Ignorar si está siendo usado
-    except Exception:
-        pass
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,232 @@
+"""Benchmark por etapas del pipeline sobre libros IVA sintéticos.
+
+Genera libros con generar_libro.py para cada tamaño pedido y mide, etapa por
+etapa (desde leer_archivo hasta generar_archivos_csv_arca), el tiempo de
+ejecución y el pico de memoria asignada según tracemalloc. El tiempo se mide
+sin tracemalloc activo y el pico de memoria en una segunda ejecución de la
+misma etapa, para que el rastreo no infle los tiempos.
+
+Ejemplo:
+
+    python benchmarks/benchmark.py --tamanios 1000 10000 100000 1000000 \
+        --json resultados.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iva_simple.arca import (  # noqa: E402
+    generar_archivos_csv_arca,
+    obtener_conceptos_unicos,
+    procesar_dataframe_para_arca,
+)
+from iva_simple.bloques import procesar_por_bloques  # noqa: E402
+from iva_simple.dataframes import (  # noqa: E402
+    agregar_columna_total,
+    combinar_movimientos_duplicados,
+    crear_dataframe_movimientos,
+)
+from iva_simple.excel import crear_archivo_excel  # noqa: E402
+from iva_simple.lectura import (  # noqa: E402
+    leer_archivo,
+    limpiar_lineas,
+    procesar_encabezado,
+)
+from iva_simple.movimientos import procesar_movimientos  # noqa: E402
+from iva_simple.pipeline import (  # noqa: E402
+    parsear_archivo,
+    parsear_archivo_por_paginas,
+)
+from iva_simple.tasas import formato_arca  # noqa: E402
+from generar_libro import escribir_libro  # noqa: E402
+
+TAMANIOS = [1000, 10000, 100000, 1000000]
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+
+def medir(funcion, *args, memoria=True, copiar=False):
+    """Ejecuta funcion(*args) y devuelve (resultado, segundos, pico_bytes).
+
+    Con copiar=True cada ejecución recibe copias de los DataFrames, hechas
+    fuera de la medición, para las etapas que modifican su entrada.
+    """
+
+    def argumentos():
+        if not copiar:
+            return args
+        return [arg.copy() if hasattr(arg, "copy") else arg for arg in args]
+
+    entrada = argumentos()
+    inicio = time.perf_counter()
+    resultado = funcion(*entrada)
+    segundos = time.perf_counter() - inicio
+
+    pico = None
+    if memoria:
+        del resultado
+        entrada = argumentos()
+        tracemalloc.start()
+        try:
+            resultado = funcion(*entrada)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return resultado, segundos, pico
+
+
+def ejecutar_etapas(ruta, tipo, directorio, memoria=True, excel=True):
+    """Mide cada etapa del pipeline sobre un libro y devuelve una fila por etapa"""
+    filas = []
+
+    def etapa(nombre, funcion, *args, copiar=False):
+        resultado, segundos, pico = medir(
+            funcion, *args, memoria=memoria, copiar=copiar
+        )
+        filas.append({"etapa": nombre, "segundos": segundos, "pico_bytes": pico})
+        return resultado
+
+    lines = etapa("lectura", leer_archivo, ruta)
+    etapa("encabezado", procesar_encabezado, lines)
+    cleaned_lines, compras_o_ventas = etapa("limpieza", limpiar_lineas, lines)
+    del lines
+    movements = etapa(
+        "movimientos", procesar_movimientos, cleaned_lines, compras_o_ventas
+    )
+    del cleaned_lines
+    df = etapa("dataframe", crear_dataframe_movimientos, movements)
+    del movements
+    df_final = etapa("combinacion", combinar_movimientos_duplicados, df)
+    del df
+    df_final_sin_totales = etapa(
+        "totales", agregar_columna_total, df_final, copiar=True
+    )
+    del df_final
+
+    if excel:
+        etapa("excel", crear_archivo_excel, df_final_sin_totales, directorio)
+
+    # Los CSV de ARCA de Compras están en desarrollo
+    if formato_arca(compras_o_ventas) is not None:
+        actividad_por_concepto = {
+            concepto: "000000"
+            for concepto in obtener_conceptos_unicos(df_final_sin_totales)
+        }
+        df_salida = etapa(
+            "arca_dataframe",
+            procesar_dataframe_para_arca,
+            df_final_sin_totales,
+            actividad_por_concepto,
+            compras_o_ventas,
+        )
+        etapa("arca_csv", generar_archivos_csv_arca, df_salida, compras_o_ventas)
+
+    # El pipeline completo en modo streaming, como lo usa la app
+    etapa("parseo_streaming", parsear_archivo, ruta, tipo, None, True)
+
+    # El libro partido por páginas en un pool (libros de 8 MiB o más)
+    etapa("parseo_paginas", parsear_archivo_por_paginas, ruta, tipo)
+
+    # Totales y preagregado de ARCA de a bloques, con memoria acotada
+    etapa("parseo_bloques", procesar_por_bloques, ruta, tipo, 10000)
+
+    return filas, len(df_final_sin_totales)
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+
+def imprimir_resultados(tipo, tamanio, movimientos, tamanio_archivo, filas):
+    """Imprime la tabla de tiempos y memoria de un libro"""
+    print(
+        f"\n{tipo} - {tamanio:,} movimientos generados, {movimientos:,} en el "
+        f"resultado, {tamanio_archivo / 2**20:.1f} MiB"
+    )
+    print(f"  {'etapa':<18}{'segundos':>10}{'pico MiB':>12}")
+    for fila in filas:
+        pico = fila["pico_bytes"]
+        pico_texto = f"{pico / 2**20:.1f}" if pico is not None else "-"
+        print(f"  {fila['etapa']:<18}{fila['segundos']:>10.3f}{pico_texto:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mide tiempo y memoria de cada etapa del pipeline sobre libros sintéticos."
+    )
+    parser.add_argument(
+        "--tamanios",
+        type=int,
+        nargs="+",
+        default=TAMANIOS,
+        help="Cantidades de movimientos a generar (default: 1000 10000 100000 1000000)",
+    )
+    parser.add_argument(
+        "--tipos",
+        nargs="+",
+        choices=["Ventas", "Compras"],
+        default=["Ventas", "Compras"],
+    )
+    parser.add_argument(
+        "--sin-memoria",
+        action="store_true",
+        help="No medir el pico de memoria (evita la segunda ejecución de cada etapa)",
+    )
+    parser.add_argument(
+        "--sin-excel", action="store_true", help="Omitir la etapa de Excel"
+    )
+    parser.add_argument(
+        "--json", help="Archivo JSON lines donde agregar una línea por etapa"
+    )
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for tipo in args.tipos:
+            for tamanio in args.tamanios:
+                ruta = os.path.join(directorio, f"libro_{tipo}_{tamanio}.txt")
+                escribir_libro(ruta, tamanio, tipo=tipo, semilla=args.semilla)
+                tamanio_archivo = os.path.getsize(ruta)
+
+                filas, movimientos = ejecutar_etapas(
+                    ruta,
+                    tipo,
+                    directorio,
+                    memoria=not args.sin_memoria,
+                    excel=not args.sin_excel,
+                )
+                imprimir_resultados(
+                    tipo, tamanio, movimientos, tamanio_archivo, filas
+                )
+
+                if args.json:
+                    with open(args.json, "a", encoding="utf-8") as f:
+                        for fila in filas:
+                            registro = {
+                                "tipo": tipo,
+                                "tamanio": tamanio,
+                                "movimientos": movimientos,
+                                "bytes_archivo": tamanio_archivo,
+                                **fila,
+                            }
+                            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+                os.remove(ruta)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
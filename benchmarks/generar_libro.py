@@ -0,0 +1,281 @@
+"""Generador de libros IVA sintéticos en el formato TXT que procesa la app.
+
+Reproduce el layout de ancho fijo que corta procesar_nueva_entrada (campos en
+las columnas 0-69 y la sección de tasa/montos desde la columna 70), los
+bloques de encabezado de página entre "----" y "--", los pies "PPag.: N" y el
+cierre "TOTALES POR TASA", tanto para IVA VENTAS como para IVA COMPRAS. Con
+--partir-entre-paginas las líneas de continuación que no entran en una página
+pasan a la siguiente, como en los libros reales largos.
+
+Ejemplo:
+
+    python benchmarks/generar_libro.py --movimientos 10000 --tipo Ventas \
+        --salida libro_ventas.txt
+"""
+
+import argparse
+import random
+import sys
+
+# Tasas con neto e IVA separados y su alícuota
+TASAS_CON_IVA = {
+    "Tasa 21%": 0.21,
+    "T.10.5%": 0.105,
+    "Tasa 27%": 0.27,
+    "C.F.21%": 0.21,
+    "C.F.10.5%": 0.105,
+    "Tasa 2.5%": 0.025,
+    "T.IMP 21%": 0.21,
+    "T.IMP 10%": 0.10,
+    "R.Monot21": 0.21,
+    "R.Mont.10": 0.105,
+}
+
+# Tasas con un único monto
+TASAS_SIN_IVA = ["Exento", "Perc.IIBB", "Perc.IVA"]
+
+# Mezcla de alícuotas por defecto (tasa -> peso relativo)
+MEZCLA_ALICUOTAS = {
+    "Tasa 21%": 50,
+    "T.10.5%": 12,
+    "Tasa 27%": 5,
+    "C.F.21%": 10,
+    "C.F.10.5%": 3,
+    "R.Monot21": 5,
+    "R.Mont.10": 2,
+    "Exento": 8,
+    "Perc.IIBB": 5,
+}
+
+RAZONES_SOCIALES = [
+    "DISTRIBUIDORA NORTE SA",
+    "PEREZ JUAN CARLOS",
+    "GOMEZ ANA MARIA",
+    "SERVICIOS DEL SUR SRL",
+    "LOPEZ Y CIA SH",
+    "MUÑOZ HNOS SRL",
+    "CONSUMIDOR FINAL",
+    "TRANSPORTE ANDINO SA",
+]
+
+CONDICIONES = ["INS.", "INS.", "INS.", "C.F.", "MONO", "EXE "]
+CONCEPTOS = [1, 2, 3, 84, 85, 152]
+
+ANCHO_LINEA = 125
+
+
+def formatear_monto(valor):
+    """Formatea un monto como en el TXT: coma decimal y sin separador de miles"""
+    return f"{valor:.2f}".replace(".", ",")
+
+
+def seccion_montos(tasa, neto):
+    """Arma la sección de tasa y montos que empieza en la columna 70"""
+    if tasa in TASAS_CON_IVA:
+        iva = round(neto * TASAS_CON_IVA[tasa], 2)
+        montos = [formatear_monto(neto), formatear_monto(iva)]
+    else:
+        iva = 0
+        montos = [formatear_monto(neto), ""]
+    total = formatear_monto(neto + iva)
+    return f"{tasa:<10}{montos[0]:>15}{montos[1]:>15}{total:>15}"
+
+
+def linea_entrada(campos, tasa, neto):
+    """Arma la línea principal de un movimiento con los campos de ancho fijo"""
+    cabecera = (
+        f"{campos['dia']:02d} {campos['comprobante']:2.2s} {campos['pv']:05d} "
+        f"{campos['nro']:08d}{campos['letra']:1.1s} {campos['razon_social']:<22.22s} "
+        f"{campos['condicion']:4.4s} {campos['cuit']:13.13s} "
+        f"{campos['concepto']:03d} {campos['jurisdiccion']:1.1s} "
+    )
+    return cabecera + seccion_montos(tasa, neto)
+
+
+def linea_continuacion(tasa, neto):
+    """Arma una línea de continuación (otra tasa del mismo comprobante)"""
+    return " " * 70 + seccion_montos(tasa, neto)
+
+
+def bloque_encabezado_pagina(tipo, pagina, periodo):
+    """Bloque de encabezado de página que la limpieza descarta"""
+    return [
+        "-" * ANCHO_LINEA,
+        f"  LIBRO IVA {tipo.upper()}   PERIODO {periodo}".ljust(100)
+        + f"Hoja {pagina}",
+        "Fe Cp PV    Numero   L Razon Social           Cond CUIT          Con J Tasa"
+        "                Neto            IVA          Total",
+        "-- " + "-" * 20,
+    ]
+
+
+def generar_libro(
+    movimientos,
+    tipo="Ventas",
+    mezcla=None,
+    proporcion_nc=0.1,
+    proporcion_continuaciones=0.3,
+    max_continuaciones=3,
+    proporcion_duplicados=0.02,
+    lineas_por_pagina=60,
+    partir_entre_paginas=False,
+    semilla=0,
+):
+    """Genera las líneas (sin salto de línea) de un libro IVA sintético.
+
+    mezcla es un dict tasa -> peso relativo; proporcion_continuaciones es la
+    probabilidad de que un comprobante tenga líneas de otras tasas, y
+    proporcion_duplicados la de que un comprobante se repita en la fila
+    siguiente (como cuando el sistema de origen lo parte en dos renglones).
+    Con partir_entre_paginas, un comprobante que no entra en la página deja
+    ahí las líneas que entran y sigue en la página siguiente con sus
+    continuaciones; si no, pasa entero a la página siguiente.
+    """
+    azar = random.Random(semilla)
+    mezcla = mezcla or MEZCLA_ALICUOTAS
+    tasas = list(mezcla)
+    pesos = [mezcla[tasa] for tasa in tasas]
+    periodo = "10/2026"
+
+    lineas = [
+        "\x1b[0m",
+        "EMPRESA DEMO SA",
+        "AV. SIEMPRE VIVA 742 - CABA",
+        "30-71234567-9",
+        f"LIBRO  IVA {tipo.upper()}",
+        f"PERIODO  {periodo}",
+        "",
+        "",
+        "",
+    ]
+
+    pagina = 1
+    en_pagina = 0
+    lineas.extend(bloque_encabezado_pagina(tipo, pagina, periodo))
+
+    nro = 0
+    campos = None
+    for _ in range(movimientos):
+        if campos is not None and azar.random() < proporcion_duplicados:
+            # Mismo comprobante en la fila siguiente
+            pass
+        else:
+            nro += 1
+            campos = {
+                "dia": azar.randint(1, 28),
+                "comprobante": "NC" if azar.random() < proporcion_nc else "FA",
+                "pv": azar.randint(1, 5),
+                "nro": nro,
+                "letra": azar.choice("AB"),
+                "razon_social": azar.choice(RAZONES_SOCIALES),
+                "condicion": azar.choice(CONDICIONES),
+                "cuit": f"20-{azar.randint(10000000, 45000000)}-{azar.randint(0, 9)}",
+                "concepto": azar.choice(CONCEPTOS),
+                "jurisdiccion": str(azar.randint(1, 9)),
+            }
+
+        renglones = [
+            linea_entrada(
+                campos,
+                azar.choices(tasas, pesos)[0],
+                round(azar.uniform(10, 250000), 2),
+            )
+        ]
+        if azar.random() < proporcion_continuaciones:
+            for _ in range(azar.randint(1, max_continuaciones)):
+                renglones.append(
+                    linea_continuacion(
+                        azar.choices(tasas, pesos)[0],
+                        round(azar.uniform(10, 50000), 2),
+                    )
+                )
+
+        if en_pagina + len(renglones) > lineas_por_pagina:
+            if partir_entre_paginas:
+                disponibles = lineas_por_pagina - en_pagina
+                lineas.extend(renglones[:disponibles])
+                renglones = renglones[disponibles:]
+            lineas.append(" " * 100 + f"PPag.: {pagina}")
+            pagina += 1
+            en_pagina = 0
+            lineas.extend(bloque_encabezado_pagina(tipo, pagina, periodo))
+
+        lineas.extend(renglones)
+        en_pagina += len(renglones)
+
+    lineas.append(" " * 100 + f"PPag.: {pagina}")
+    lineas.append("-" * ANCHO_LINEA)
+    lineas.append("TOTALES POR TASA")
+    for tasa in tasas:
+        lineas.append(f"{tasa:<10}{formatear_monto(0):>15}")
+
+    return lineas
+
+
+def escribir_libro(ruta, movimientos, **opciones):
+    """Genera un libro sintético y lo escribe en Latin-1 con saltos CRLF"""
+    with open(ruta, "w", encoding="latin-1", newline="\r\n") as f:
+        for linea in generar_libro(movimientos, **opciones):
+            f.write(linea + "\n")
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Genera un libro IVA sintético en formato TXT."
+    )
+    parser.add_argument("--movimientos", type=int, default=1000)
+    parser.add_argument("--tipo", choices=["Ventas", "Compras"], default="Ventas")
+    parser.add_argument("--salida", required=True, help="Ruta del TXT a generar")
+    parser.add_argument(
+        "--nc", type=float, default=0.1, help="Proporción de notas de crédito"
+    )
+    parser.add_argument(
+        "--continuaciones",
+        type=float,
+        default=0.3,
+        help="Proporción de comprobantes con líneas de otras tasas",
+    )
+    parser.add_argument("--max-continuaciones", type=int, default=3)
+    parser.add_argument(
+        "--duplicados",
+        type=float,
+        default=0.02,
+        help="Proporción de comprobantes repetidos en la fila siguiente",
+    )
+    parser.add_argument(
+        "--mezcla",
+        help='Mezcla de alícuotas como "Tasa 21%%=50,T.10.5%%=10,Exento=5"',
+    )
+    parser.add_argument(
+        "--partir-entre-paginas",
+        action="store_true",
+        help="Pasar a la página siguiente las continuaciones que no entran en la página",
+    )
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    mezcla = None
+    if args.mezcla:
+        mezcla = {}
+        for parte in args.mezcla.split(","):
+            tasa, _, peso = parte.rpartition("=")
+            mezcla[tasa.strip()] = float(peso)
+
+    escribir_libro(
+        args.salida,
+        args.movimientos,
+        tipo=args.tipo,
+        mezcla=mezcla,
+        proporcion_nc=args.nc,
+        proporcion_continuaciones=args.continuaciones,
+        max_continuaciones=args.max_continuaciones,
+        proporcion_duplicados=args.duplicados,
+        partir_entre_paginas=args.partir_entre_paginas,
+        semilla=args.semilla,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Tiempo de importación de la app y de los módulos de iva_simple.
+
+Cada medición corre en un intérprete nuevo (sin módulos en caché) y se toma
+el mínimo de varias repeticiones. Además de importar, mide el arranque
+completo de un proceso que parsea un libro chico, que es lo que paga cada
+corrida de lote.py o cada worker de un pool con inicio "spawn".
+
+Ejemplo:
+
+    python benchmarks/tiempo_importacion.py --repeticiones 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, RAIZ)
+
+from generar_libro import escribir_libro  # noqa: E402
+
+MODULOS = [
+    "iva_simple.lectura",
+    "iva_simple.movimientos",
+    "iva_simple.pipeline",
+    "iva_simple.arca",
+    "iva_simple.excel",
+    "app",
+]
+
+# Módulos pesados cuya carga se informa por cada importación
+MODULOS_PESADOS = ["pandas", "openpyxl", "pyarrow", "streamlit"]
+
+
+def medir_codigo(codigo, repeticiones):
+    """Ejecuta codigo en intérpretes nuevos y devuelve (mínimo de segundos, salida)"""
+    mejor = None
+    salida = ""
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        segundos = time.perf_counter() - inicio
+        if mejor is None or segundos < mejor:
+            mejor = segundos
+        salida = resultado.stdout.strip()
+    return mejor, salida
+
+
+def codigo_importacion(modulo):
+    """Código que importa modulo e imprime qué módulos pesados quedaron cargados"""
+    return (
+        "import sys\n"
+        f"import {modulo}\n"
+        f"print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))\n"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mide el tiempo de importación en intérpretes nuevos."
+    )
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument(
+        "--movimientos",
+        type=int,
+        default=200,
+        help="Movimientos del libro chico que se parsea al final (default: 200)",
+    )
+    args = parser.parse_args(argv)
+
+    base, _ = medir_codigo("pass", args.repeticiones)
+    print(f"intérprete vacío: {base:.3f} s\n")
+    print(f"  {'módulo':<24}{'segundos':>10}{'sin base':>10}  cargados")
+
+    for modulo in MODULOS:
+        try:
+            segundos, cargados = medir_codigo(
+                codigo_importacion(modulo), args.repeticiones
+            )
+        except subprocess.CalledProcessError:
+            print(f"  {modulo:<24}{'error':>10}")
+            continue
+        print(
+            f"  {modulo:<24}{segundos:>10.3f}{segundos - base:>10.3f}  {cargados or '-'}"
+        )
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "libro.txt")
+        escribir_libro(ruta, args.movimientos)
+        codigo = (
+            "from iva_simple.pipeline import parsear_archivo\n"
+            f"parsear_archivo({ruta!r}, 'Ventas')\n"
+        )
+        segundos, _ = medir_codigo(codigo, args.repeticiones)
+        print(
+            f"\nimportar y parsear {args.movimientos} movimientos: {segundos:.3f} s"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
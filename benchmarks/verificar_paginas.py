@@ -0,0 +1,144 @@
+"""Verifica que el parseo por páginas dé lo mismo que parsear_archivo.
+
+Genera libros sintéticos con comprobantes partidos entre páginas (líneas de
+continuación después del salto de página), los parsea partidos en segmentos
+con parsear_archivo_por_paginas, sin tamaño mínimo, y compara movimientos,
+encabezado y tipo con los de parsear_archivo sobre el mismo libro. Informa
+también cuántos bloques de página descartó es_corte_seguro, para confirmar
+que los libros ejercitan los cortes movidos.
+
+Ejemplo:
+
+    python benchmarks/verificar_paginas.py --movimientos 2000 20000 --procesos 2 3 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, RAIZ)
+
+from iva_simple.lectura import (  # noqa: E402
+    abrir_datos,
+    buscar_segmentos_paginas,
+    es_corte_seguro,
+    inicio_cuerpo,
+)
+from iva_simple.pipeline import (  # noqa: E402
+    parsear_archivo,
+    parsear_archivo_por_paginas,
+)
+from generar_libro import escribir_libro  # noqa: E402
+
+
+# ============================================================================
+# VERIFICACIÓN
+# ============================================================================
+
+
+def contar_cortes(ruta, procesos):
+    """Devuelve (bloques de página, bloques no seguros, segmentos) del libro"""
+    with abrir_datos(ruta) as datos:
+        bloques = no_seguros = 0
+        posicion = datos.find(b"\n----", inicio_cuerpo(datos) - 1)
+        while posicion != -1:
+            bloques += 1
+            if not es_corte_seguro(datos, posicion + 1):
+                no_seguros += 1
+            posicion = datos.find(b"\n----", posicion + 1)
+        segmentos = len(buscar_segmentos_paginas(datos, procesos))
+    return bloques, no_seguros, segmentos
+
+
+def comparar(esperado, obtenido):
+    """Devuelve la lista de diferencias entre dos resultados de parseo"""
+    df_esperado, encabezado_esperado, tipo_esperado = esperado
+    df_obtenido, encabezado_obtenido, tipo_obtenido = obtenido
+    diferencias = []
+    if encabezado_esperado != encabezado_obtenido:
+        diferencias.append("encabezado")
+    if tipo_esperado != tipo_obtenido:
+        diferencias.append(f"tipo {tipo_esperado!r} != {tipo_obtenido!r}")
+    if list(df_esperado.columns) != list(df_obtenido.columns):
+        diferencias.append("columnas")
+        return diferencias
+    if not df_esperado.dtypes.equals(df_obtenido.dtypes):
+        diferencias.append("tipos de columna")
+    if not df_esperado.astype(object).equals(df_obtenido.astype(object)):
+        diferencias.append(f"movimientos ({len(df_esperado)} y {len(df_obtenido)} filas)")
+    return diferencias
+
+
+def verificar_libro(ruta, tipo, procesos):
+    """Compara el parseo por páginas con parsear_archivo; devuelve la cantidad de fallas"""
+    fallas = 0
+    for combinar in (False, True):
+        esperado = parsear_archivo(
+            ruta, tipo, streaming=True, combinar_no_consecutivos=combinar
+        )
+        for cantidad in procesos:
+            bloques, no_seguros, segmentos = contar_cortes(ruta, cantidad)
+            obtenido = parsear_archivo_por_paginas(
+                ruta,
+                tipo,
+                combinar_no_consecutivos=combinar,
+                procesos=cantidad,
+                tamanio_minimo=0,
+            )
+            diferencias = comparar(esperado, obtenido)
+            fallas += bool(diferencias)
+            print(
+                f"  procesos={cantidad:<3} combinar={combinar!s:<5} "
+                f"segmentos={segmentos:<3} bloques={bloques} no seguros={no_seguros}  "
+                + ("OK" if not diferencias else "DIFIERE: " + ", ".join(diferencias))
+            )
+    return fallas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Verifica el parseo por páginas con comprobantes partidos entre páginas."
+    )
+    parser.add_argument("--movimientos", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument(
+        "--tipos",
+        nargs="+",
+        choices=["Ventas", "Compras"],
+        default=["Ventas", "Compras"],
+    )
+    parser.add_argument("--procesos", type=int, nargs="+", default=[2, 3, 8])
+    parser.add_argument(
+        "--lineas-por-pagina",
+        type=int,
+        default=20,
+        help="Renglones de movimientos por página (menos páginas: menos cortes)",
+    )
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fallas = 0
+    with tempfile.TemporaryDirectory() as directorio:
+        for tipo in args.tipos:
+            for movimientos in args.movimientos:
+                ruta = os.path.join(directorio, f"libro_{tipo}_{movimientos}.txt")
+                escribir_libro(
+                    ruta,
+                    movimientos,
+                    tipo=tipo,
+                    proporcion_continuaciones=0.6,
+                    lineas_por_pagina=args.lineas_por_pagina,
+                    partir_entre_paginas=True,
+                    semilla=args.semilla,
+                )
+                print(f"{tipo} - {movimientos:,} movimientos")
+                fallas += verificar_libro(ruta, tipo, args.procesos)
+
+    print("Sin diferencias" if not fallas else f"{fallas} comparaciones con diferencias")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+"""Parseo de libros IVA en TXT y generación de Excel, Parquet y CSV para ARCA, sin interfaz.
+
+Los módulos se importan por separado para no cargar más de lo necesario:
+lectura y movimientos no usan pandas, y excel y parquet importan openpyxl y
+pyarrow recién al usarlos.
+
+    from iva_simple.pipeline import parsear_archivo
+    from iva_simple.arca import procesar_dataframe_para_arca, generar_archivos_csv_arca
+"""
@@ -0,0 +1,281 @@
+"""Generación de los CSV para ARCA a partir del DataFrame de movimientos."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .montos import COLUMNAS_ORIGEN, centavos_a_texto
+from .tasas import ALICUOTAS_ARCA, formato_arca
+
+
+# ============================================================================
+# FUNCIONES PARA GENERAR ARCHIVOS ARCA (CSV)
+# ============================================================================
+
+
+def obtener_conceptos_unicos(df):
+    """Obtiene los conceptos únicos presentes en ventas (no NC)"""
+    conceptos_en_ventas = set(
+        df[df["Comprobante"] != "NC"]["Concepto"].astype(str).unique()
+    )
+    return sorted(list(conceptos_en_ventas))
+
+
+def formatear_concepto_para_display(concepto):
+    """Formatea un concepto solo para mostrar en la interfaz (quita .0 innecesarios)"""
+    try:
+        # Si es un número entero (ej: "106.0"), mostrar sin decimales
+        if "." in str(concepto) and float(concepto) == int(float(concepto)):
+            return str(int(float(concepto)))
+        else:
+            return str(concepto)
+    except (ValueError, TypeError):
+        # Si no se puede convertir a número, devolver como está
+        return str(concepto)
+
+
+def procesar_dataframe_para_arca(df, actividad_por_concepto, compras_o_ventas="Ventas"):
+    """Procesa el DataFrame y genera los datos para ARCA (montos en centavos).
+
+    Las columnas de cada alícuota salen de ALICUOTAS_ARCA para el libro, y se
+    pasan a formato largo de una sola vez: una fila por movimiento y alícuota
+    con monto distinto de cero, en el orden de los movimientos y, dentro de
+    cada uno, de la tabla de tasas. El tipo de sujeto y el tipo de operación
+    salen de FORMATOS_ARCA; los encabezados del libro se ponen recién en
+    generar_archivos_csv_arca.
+    """
+    formato = obtener_formato_arca(compras_o_ventas)
+
+    cantidad = len(df)
+    ceros = np.zeros(cantidad, dtype="int64")
+    alicuotas = [
+        columnas
+        for columnas in ALICUOTAS_ARCA[compras_o_ventas]
+        if all(col is None or col in df.columns for col in columnas[:3])
+    ]
+
+    def columna(nombre):
+        return ceros if nombre is None else df[nombre].to_numpy()
+
+    # Matrices movimiento x alícuota
+    netos = [columna(neto) for neto, _, _, _ in alicuotas]
+    ivas = [columna(iva) for _, iva, _, _ in alicuotas]
+    exentos = [columna(exento) for _, _, exento, _ in alicuotas]
+    codigos = [codigo for _, _, _, codigo in alicuotas]
+
+    if codigos:
+        monto_neto = np.column_stack(netos).ravel()
+        iva = np.column_stack(ivas).ravel()
+        exento = np.column_stack(exentos).ravel()
+    else:
+        monto_neto = iva = exento = ceros[:0]
+    posicion = np.repeat(np.arange(cantidad), len(codigos))
+    codigo_alicuota = np.tile(np.array(codigos, dtype=object), cantidad)
+
+    # Descartar las alícuotas sin montos
+    mascara = (monto_neto != 0) | (iva != 0) | (exento != 0)
+    monto_neto, iva, exento = monto_neto[mascara], iva[mascara], exento[mascara]
+    posicion, codigo_alicuota = posicion[mascara], codigo_alicuota[mascara]
+
+    concepto = df["Concepto"].astype(str).to_numpy()[posicion]
+    condicion = df["Condicion"].astype(str).str.strip().str.upper()
+    tipo_sujeto = (
+        condicion.map(formato["sujeto_por_condicion"]).fillna("").to_numpy()
+    )
+    es_nc = (df["Comprobante"].astype(str).str.upper() == "NC").to_numpy()[posicion]
+
+    # Las notas de crédito se informan en valor absoluto
+    monto_neto = np.where(es_nc, np.abs(monto_neto), monto_neto)
+    iva = np.where(es_nc, np.abs(iva), iva)
+    exento = np.where(es_nc, np.abs(exento), exento)
+
+    df_salida = pd.DataFrame(
+        {
+            "Tipo de Operacion": np.where(
+                np.isin(concepto, formato["conceptos_operacion_2"]), "2", "1"
+            ),
+            "Tipo de sujeto": tipo_sujeto[posicion],
+            "Codigo de Alicuota": codigo_alicuota,
+            "Monto Neto Gravado": monto_neto,
+            "IVA": iva,
+            "Monto Neto Exento o No Gravado": exento,
+            "EsNotaCredito": es_nc,
+            "Concepto_original": concepto,
+            "idx_original": df.index.to_numpy()[posicion],
+        }
+    )
+
+    # Libro de origen de cada fila (vista consolidada de varios archivos)
+    for col in reversed(COLUMNAS_ORIGEN):
+        if col in df.columns:
+            df_salida.insert(0, col, df[col].to_numpy()[posicion])
+
+    # Eliminar filas donde 'Tipo de sujeto' está vacío
+    df_salida = df_salida[
+        df_salida["Tipo de sujeto"].astype(str).str.strip() != ""
+    ].copy()
+
+    # Asignar columna "Actividad" según el concepto
+    df_salida["Actividad"] = df_salida["Concepto_original"].map(actividad_por_concepto)
+
+    return df_salida
+
+
+def preagregar_arca(df, compras_o_ventas="Ventas"):
+    """Suma los montos para ARCA por concepto, tipo de operación, tipo de sujeto, alícuota y NC.
+
+    Es la parte de procesar_dataframe_para_arca que depende del libro y no de
+    los códigos de actividad; con cualquier asignación de actividades basta
+    pasar esta tabla chica por asignar_actividades_arca.
+    """
+    df_salida = procesar_dataframe_para_arca(df, {}, compras_o_ventas)
+    return (
+        df_salida.drop(columns=["idx_original", "Actividad"])
+        .groupby(claves_preagregado(df_salida), as_index=False, sort=False)
+        .sum()
+    )
+
+
+def claves_preagregado(df_salida):
+    """Columnas por las que se agrupa el preagregado de ARCA"""
+    return [col for col in COLUMNAS_ORIGEN if col in df_salida.columns] + [
+        "Concepto_original",
+        "Tipo de Operacion",
+        "Tipo de sujeto",
+        "Codigo de Alicuota",
+        "EsNotaCredito",
+    ]
+
+
+def combinar_preagregados(preagregados):
+    """Suma preagregados parciales (por ejemplo, de bloques de un mismo libro) en uno solo.
+
+    La suma es asociativa, así que el resultado es el mismo que el de
+    preagregar_arca sobre todos los movimientos juntos.
+    """
+    con_filas = [preagregado for preagregado in preagregados if len(preagregado)]
+    if not con_filas:
+        return preagregados[0]
+    df = pd.concat(con_filas, ignore_index=True)
+    return df.groupby(claves_preagregado(df), as_index=False, sort=False).sum()
+
+
+def asignar_actividades_arca(preagregado, actividad_por_concepto):
+    """Asigna la actividad de cada concepto al preagregado; el resultado va a generar_archivos_csv_arca"""
+    df_salida = preagregado.copy()
+    df_salida["Actividad"] = df_salida["Concepto_original"].map(actividad_por_concepto)
+    return df_salida
+
+
+def generar_archivos_csv_arca(df_salida, compras_o_ventas="Ventas"):
+    """Genera en memoria el contenido de los CSV para ARCA (notas de crédito y otros)"""
+    formato = obtener_formato_arca(compras_o_ventas)
+
+    # Separar notas de crédito y otros
+    df_nc = df_salida[df_salida["EsNotaCredito"] == True].copy()
+    df_otros = df_salida[df_salida["EsNotaCredito"] == False].copy()
+
+    # Eliminar columnas auxiliares antes de agrupar
+    columnas_auxiliares = ["EsNotaCredito", "Concepto_original", "idx_original"]
+    df_nc = df_nc.drop(columns=columnas_auxiliares, errors="ignore")
+    df_otros = df_otros.drop(columns=columnas_auxiliares, errors="ignore")
+
+    # Agrupar incluyendo la columna "Actividad" como primer campo (precedida
+    # por el libro de origen en la vista consolidada); la suma en centavos
+    # enteros es exacta y no necesita redondeo posterior
+    columnas_origen = [col for col in COLUMNAS_ORIGEN if col in df_salida.columns]
+    columnas_grupo = columnas_origen + [
+        "Actividad",
+        "Tipo de Operacion",
+        "Tipo de sujeto",
+        "Codigo de Alicuota",
+    ]
+    df_nc_agrupado = df_nc.groupby(columnas_grupo, as_index=False).sum()
+    df_otros_agrupado = df_otros.groupby(columnas_grupo, as_index=False).sum()
+
+    # Reordenar columnas para que "Actividad" quede primera
+    primeras = columnas_origen + ["Actividad"]
+    column_order_nc = primeras + [
+        col for col in df_nc_agrupado.columns if col not in primeras
+    ]
+    column_order_otros = primeras + [
+        col for col in df_otros_agrupado.columns if col not in primeras
+    ]
+
+    df_nc_agrupado = df_nc_agrupado[column_order_nc]
+    df_otros_agrupado = df_otros_agrupado[column_order_otros]
+
+    # Pasar los centavos a texto con 2 decimales (coma decimal), con los
+    # ceros como cadenas vacías
+    columnas_numericas = ["Monto Neto Gravado", "IVA", "Monto Neto Exento o No Gravado"]
+
+    for col in columnas_numericas:
+        df_nc_agrupado[col] = centavos_a_texto(df_nc_agrupado[col])
+        df_otros_agrupado[col] = centavos_a_texto(df_otros_agrupado[col])
+
+    # Encabezados del libro
+    df_nc_agrupado = aplicar_encabezados_arca(
+        df_nc_agrupado, formato["sujeto"], formato["iva_nc"]
+    )
+    df_otros_agrupado = aplicar_encabezados_arca(
+        df_otros_agrupado, formato["sujeto"], formato["iva"]
+    )
+
+    # Serializar en memoria, sin pasar por archivos temporales
+    csv_nc = serializar_csv_arca(df_nc_agrupado)
+    csv_otros = serializar_csv_arca(df_otros_agrupado)
+
+    return csv_nc, csv_otros, df_nc_agrupado, df_otros_agrupado
+
+
+def obtener_formato_arca(compras_o_ventas):
+    """Formato de los CSV de ARCA del libro; ValueError si el libro todavía no los genera"""
+    formato = formato_arca(compras_o_ventas)
+    if formato is None:
+        raise ValueError(
+            f"La generación de archivos para ARCA de {compras_o_ventas or 'libros sin tipo'} "
+            "todavía no está disponible"
+        )
+    return formato
+
+
+def aplicar_encabezados_arca(df_agrupado, encabezado_sujeto, encabezados_iva):
+    """Pone los encabezados del libro: el del tipo de sujeto y el IVA en cada columna en que se informa"""
+    df_agrupado = df_agrupado.rename(columns={"Tipo de sujeto": encabezado_sujeto})
+    posicion = df_agrupado.columns.get_loc("IVA")
+    iva = df_agrupado.pop("IVA")
+    for i, encabezado in enumerate(encabezados_iva):
+        df_agrupado.insert(posicion + i, encabezado, iva)
+    return df_agrupado
+
+
+def serializar_csv_arca(df_agrupado):
+    """Serializa un DataFrame de texto al formato de ARCA.
+
+    Devuelve bytes Latin-1 separados por ";", con comillas solo en el encabezado
+    y sin comillas en los valores.
+    """
+    lineas = [";".join(f'"{col}"' for col in df_agrupado.columns)]
+
+    if len(df_agrupado) > 0:
+        filas = df_agrupado.iloc[:, 0].astype(str)
+        for col in df_agrupado.columns[1:]:
+            filas = filas + ";" + df_agrupado[col].astype(str)
+        lineas.extend(filas)
+
+    return ("\n".join(lineas) + "\n").encode("latin-1")
+
+
+def guardar_archivos_csv_arca(csv_nc, csv_otros, directorio=".", compras_o_ventas="Ventas"):
+    """Escribe los CSV de ARCA en el directorio y devuelve sus rutas"""
+    archivo_nc, archivo_otros = obtener_formato_arca(compras_o_ventas)["archivos"]
+    nombre_nc = os.path.join(directorio, archivo_nc + ".csv")
+    nombre_otros = os.path.join(directorio, archivo_otros + ".csv")
+
+    with open(nombre_nc, "wb") as f:
+        f.write(csv_nc)
+    with open(nombre_otros, "wb") as f:
+        f.write(csv_otros)
+
+    return nombre_nc, nombre_otros
@@ -0,0 +1,152 @@
+"""Procesamiento por bloques: totales y preagregado de ARCA sin armar el DataFrame completo."""
+
+from itertools import islice
+
+from .arca import combinar_preagregados, obtener_conceptos_unicos, preagregar_arca
+from .dataframes import (
+    agregar_columna_total,
+    combinar_movimientos_duplicados,
+    concatenar_movimientos,
+    crear_dataframe_movimientos,
+)
+from .diagnostico import iniciar_medicion, registrar_tiempo
+from .lectura import abrir_libro, crear_estado_parseo
+from .montos import columnas_montos
+from .movimientos import iterar_movimientos
+from .tasas import formato_arca
+
+
+# ============================================================================
+# PROCESAMIENTO POR BLOQUES
+# ============================================================================
+
+TAMANIO_BLOQUE = 100_000
+
+# Con bloques más chicos el costo fijo de pandas por bloque supera al parseo
+TAMANIO_MINIMO_BLOQUE = 1000
+
+# Los resúmenes parciales se combinan de a tantos, no de a uno por bloque
+PARCIALES_POR_COMBINACION = 64
+
+
+def iterar_bloques(movements, tamanio_bloque):
+    """Agrupa los movimientos (lista o generador) en listas de hasta tamanio_bloque"""
+    movements = iter(movements)
+    while True:
+        bloque = list(islice(movements, tamanio_bloque))
+        if not bloque:
+            return
+        yield bloque
+
+
+def iterar_bloques_combinados(movements, tamanio_bloque=TAMANIO_BLOQUE):
+    """Genera DataFrames de movimientos ya combinados, de a un bloque por vez.
+
+    Un comprobante repetido en filas consecutivas puede quedar partido entre
+    dos bloques, así que la última fila combinada de cada bloque no se entrega:
+    pasa al principio del bloque siguiente y se combina con él. El resultado
+    es el mismo que combinar_movimientos_duplicados sobre todos los movimientos.
+    """
+    pendiente = None
+
+    for bloque in iterar_bloques(movements, tamanio_bloque):
+        df = crear_dataframe_movimientos(bloque)
+        if pendiente is not None:
+            df = concatenar_movimientos([pendiente, df])
+
+        df = combinar_movimientos_duplicados(df)
+        pendiente = df.iloc[-1:]
+        if len(df) > 1:
+            yield df.iloc[:-1].copy()
+
+    if pendiente is not None and len(pendiente):
+        yield pendiente.copy()
+
+
+def crear_parcial(preagregado=None):
+    """Resumen parcial de un libro: movimientos, totales por columna, conceptos y preagregado de ARCA"""
+    return {
+        "movimientos": 0,
+        "totales": {},
+        "conceptos": set(),
+        "preagregado": preagregado,
+    }
+
+
+def reducir_bloque(df, compras_o_ventas):
+    """Reduce un bloque de movimientos combinados a su resumen parcial.
+
+    El preagregado de ARCA queda en None si el libro todavía no genera CSV.
+    """
+    df = agregar_columna_total(df)
+    preagregado = None
+    if formato_arca(compras_o_ventas) is not None:
+        preagregado = preagregar_arca(df, compras_o_ventas)
+    parcial = crear_parcial(preagregado)
+    parcial["movimientos"] = len(df)
+    parcial["totales"] = {
+        col: int(total) for col, total in df[columnas_montos(df)].sum().items()
+    }
+    parcial["conceptos"] = set(obtener_conceptos_unicos(df))
+    return parcial
+
+
+def combinar_parciales(parciales):
+    """Combina resúmenes parciales en uno; es asociativo, así que sirve en cualquier agrupación"""
+    resultado = crear_parcial()
+    preagregados = []
+
+    for parcial in parciales:
+        resultado["movimientos"] += parcial["movimientos"]
+        for col, total in parcial["totales"].items():
+            resultado["totales"][col] = resultado["totales"].get(col, 0) + total
+        resultado["conceptos"] |= parcial["conceptos"]
+        if parcial["preagregado"] is not None:
+            preagregados.append(parcial["preagregado"])
+
+    if preagregados:
+        resultado["preagregado"] = combinar_preagregados(preagregados)
+
+    # Total al final, como en el DataFrame de movimientos
+    if "Total" in resultado["totales"]:
+        resultado["totales"]["Total"] = resultado["totales"].pop("Total")
+    return resultado
+
+
+def procesar_por_bloques(
+    fuente, tipo_esperado=None, tamanio_bloque=TAMANIO_BLOQUE, diagnostico=None
+):
+    """Parsea un libro de a tamanio_bloque movimientos y devuelve (parcial, encabezado, compras_o_ventas).
+
+    Cada bloque se combina y se reduce a su resumen parcial antes de leer el
+    siguiente; los parciales se suman de a PARCIALES_POR_COMBINACION (cada
+    uno tiene a lo sumo una fila por concepto, sujeto y alícuota), así que la
+    memoria depende del tamaño del bloque y no del libro (para una ruta en
+    disco; bytes u objetos tipo archivo ya están enteros en memoria).
+    tamanio_bloque debe ser al menos TAMANIO_MINIMO_BLOQUE. El preagregado del resultado va
+    a asignar_actividades_arca y generar_archivos_csv_arca igual que el de
+    preagregar_arca. Solo se combinan los comprobantes repetidos en filas
+    consecutivas, como en el modo por defecto de parsear_archivo.
+    """
+    if tamanio_bloque < TAMANIO_MINIMO_BLOQUE:
+        raise ValueError(
+            f"El tamaño de bloque debe ser de al menos {TAMANIO_MINIMO_BLOQUE} movimientos"
+        )
+
+    inicio = iniciar_medicion(diagnostico)
+
+    estado = crear_estado_parseo(tipo_esperado)
+    parciales = []
+
+    with abrir_libro(fuente, estado) as (encabezado_completo, lineas):
+        movements = iterar_movimientos(lineas, estado)
+        for df in iterar_bloques_combinados(movements, tamanio_bloque):
+            compras_o_ventas = estado["compras_o_ventas"] or tipo_esperado
+            parciales.append(reducir_bloque(df, compras_o_ventas))
+            if len(parciales) == PARCIALES_POR_COMBINACION:
+                parciales = [combinar_parciales(parciales)]
+
+    acumulado = combinar_parciales(parciales)
+
+    registrar_tiempo(diagnostico, "bloques", inicio, acumulado["movimientos"])
+    return acumulado, encabezado_completo, estado["compras_o_ventas"]
@@ -0,0 +1,135 @@
+"""Caché de resultados de parseo por contenido del archivo, en memoria y en disco."""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+# ============================================================================
+# CACHÉ DE RESULTADOS ENTRE SESIONES
+# ============================================================================
+
+# Cambiar cuando cambie el resultado del parseo, para invalidar lo guardado en disco
+VERSION_PARSER = "2"
+
+
+def huella_contenido(datos):
+    """SHA-256 (hexadecimal) del contenido de un archivo"""
+    return hashlib.sha256(datos).hexdigest()
+
+
+def clave_cache(datos, tipo_movimiento, combinar_no_consecutivos=False):
+    """Clave de caché: SHA-256 del contenido más el tipo, las opciones y la versión del parser"""
+    return clave_cache_huella(
+        huella_contenido(datos), tipo_movimiento, combinar_no_consecutivos
+    )
+
+
+def clave_cache_huella(huella, tipo_movimiento, combinar_no_consecutivos=False):
+    """Como clave_cache, a partir de la huella_contenido ya calculada del archivo"""
+    return f"{huella}-{tipo_movimiento}-{int(combinar_no_consecutivos)}-v{VERSION_PARSER}"
+
+
+class CacheResultados:
+    """Caché LRU de archivos procesados (DataFrame de movimientos y encabezado).
+
+    Es compartida por todas las sesiones del proceso: el mismo libro subido por
+    otra persona, o después de recargar la página, no se vuelve a parsear. Los
+    resultados se guardan en memoria hasta max_bytes_memoria y, si se indica un
+    directorio, también en disco hasta max_bytes_disco; en ambos casos se
+    descartan primero los usados hace más tiempo. Los DataFrames devueltos se
+    comparten entre sesiones y no deben modificarse.
+    """
+
+    def __init__(self, max_bytes_memoria, directorio=None, max_bytes_disco=0):
+        self.max_bytes_memoria = max_bytes_memoria
+        self.directorio = directorio
+        self.max_bytes_disco = max_bytes_disco
+        self.entradas = OrderedDict()  # clave -> (df, encabezado, bytes)
+        self.bytes_memoria = 0
+        self.lock = threading.Lock()
+
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def ruta_disco(self, clave):
+        """Ruta del archivo en disco para una clave"""
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def obtener(self, clave):
+        """Devuelve (df, encabezado) si la clave está en caché, o None"""
+        with self.lock:
+            if clave in self.entradas:
+                self.entradas.move_to_end(clave)
+                df, encabezado, _ = self.entradas[clave]
+                return df, encabezado
+
+        if not self.directorio:
+            return None
+
+        ruta = self.ruta_disco(clave)
+        try:
+            with open(ruta, "rb") as f:
+                df, encabezado = pickle.load(f)
+            os.utime(ruta)  # marcar como usado recientemente
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        self.guardar_en_memoria(clave, df, encabezado)
+        return df, encabezado
+
+    def guardar(self, clave, df, encabezado):
+        """Guarda un resultado en memoria y, si hay directorio, en disco"""
+        self.guardar_en_memoria(clave, df, encabezado)
+        if self.directorio:
+            self.guardar_en_disco(clave, df, encabezado)
+
+    def guardar_en_memoria(self, clave, df, encabezado):
+        """Guarda un resultado en memoria, descartando los menos usados si hace falta"""
+        tamanio = int(df.memory_usage(deep=True).sum())
+        if tamanio > self.max_bytes_memoria:
+            return
+
+        with self.lock:
+            if clave in self.entradas:
+                self.bytes_memoria -= self.entradas.pop(clave)[2]
+            self.entradas[clave] = (df, encabezado, tamanio)
+            self.bytes_memoria += tamanio
+
+            # Descartar los menos usados recientemente hasta entrar en el presupuesto
+            while self.bytes_memoria > self.max_bytes_memoria:
+                _, (_, _, liberado) = self.entradas.popitem(last=False)
+                self.bytes_memoria -= liberado
+
+    def guardar_en_disco(self, clave, df, encabezado):
+        """Guarda un resultado en disco, descartando los archivos menos usados si hace falta"""
+        ruta = self.ruta_disco(clave)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                pickle.dump((df, encabezado), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except OSError:
+            return
+
+        # Descartar los archivos usados hace más tiempo hasta entrar en el presupuesto
+        archivos = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".pkl"):
+                try:
+                    estado = os.stat(os.path.join(self.directorio, nombre))
+                except OSError:
+                    continue
+                archivos.append((estado.st_mtime, estado.st_size, nombre))
+
+        total = sum(tamanio for _, tamanio, _ in archivos)
+        for _, tamanio, nombre in sorted(archivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                os.remove(os.path.join(self.directorio, nombre))
+            except OSError:
+                continue
+            total -= tamanio
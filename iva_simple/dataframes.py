@@ -0,0 +1,259 @@
+"""Armado, combinación y totales del DataFrame de movimientos."""
+
+from array import array
+from itertools import islice
+from operator import attrgetter
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .montos import columnas_montos
+from .movimientos import ANCHO_CAMPOS, CAMPOS_MOVIMIENTO, COLUMNAS_MONTOS
+
+
+# ============================================================================
+# ESQUEMA DEL DATAFRAME DE MOVIMIENTOS
+# ============================================================================
+
+# Tipos de las columnas de identificación. Los campos numéricos salen de
+# columnas de ancho fijo del TXT (Fecha 2, Concepto 3, PV 5 y Nro 8
+# caracteres), así que siempre entran en estos enteros; los códigos se
+# repiten mucho y se guardan como categorías. La razón social y el CUIT son
+# casi uno por contraparte y quedan como texto. Los montos son int64 (centavos).
+ESQUEMA_MOVIMIENTOS = {
+    "Fecha": "int8",
+    "Comprobante": "category",
+    "PV": "int32",
+    "Nro": "int32",
+    "Letra": "category",
+    "Razon Social": "object",
+    "Condicion": "category",
+    "CUIT": "object",
+    "Concepto": "int16",
+    "Jurisdiccion": "category",
+}
+
+# Proporción máxima de filas con monto para guardar una columna como dispersa
+DENSIDAD_MAXIMA_DISPERSA = 0.1
+
+# Movimientos que se pasan a columnas de una vez al armar el DataFrame
+MOVIMIENTOS_POR_TANDA = 16384
+
+
+def aplicar_esquema_movimientos(df):
+    """Convierte las columnas de identificación a los tipos de ESQUEMA_MOVIMIENTOS"""
+    for col, tipo in ESQUEMA_MOVIMIENTOS.items():
+        if col not in df.columns or df[col].dtype == tipo:
+            continue
+        if tipo == "category":
+            df[col] = df[col].fillna("").astype(str).astype("category")
+        elif tipo == "object":
+            df[col] = df[col].fillna("").astype(str).astype(object)
+        else:
+            df[col] = pd.to_numeric(df[col].fillna(0)).astype(tipo)
+    return df
+
+
+def compactar_montos_dispersos(df, densidad_maxima=DENSIDAD_MAXIMA_DISPERSA):
+    """Guarda como dispersas (SparseDtype) las columnas de montos casi siempre en cero"""
+    if len(df) == 0:
+        return df
+    df = df.copy()
+    for col in columnas_montos(df):
+        if (df[col] != 0).mean() <= densidad_maxima:
+            df[col] = df[col].astype(pd.SparseDtype("int64", 0))
+    return df
+
+
+def densificar_montos(df):
+    """Devuelve el DataFrame con todas las columnas de montos como int64 denso"""
+    dispersas = [
+        col for col in columnas_montos(df) if isinstance(df[col].dtype, pd.SparseDtype)
+    ]
+    if not dispersas:
+        return df
+    df = df.copy()
+    df[dispersas] = df[dispersas].astype("int64")
+    return df
+
+
+# ============================================================================
+# FUNCIONES DE PROCESAMIENTO DE DATAFRAMES
+# ============================================================================
+
+
+def extraer_campos_ancho_fijo(lineas):
+    """Extrae los campos de ancho fijo de las líneas principales como columnas.
+
+    Las líneas se cargan en un array de caracteres de ancho fijo y cada campo
+    se toma de una vez para todas las filas, con los tipos de
+    ESQUEMA_MOVIMIENTOS (los textos repetidos comparten el mismo str). Una línea None (un
+    movimiento sin línea principal) da "" y 0. Los números que no son solo
+    dígitos (por ejemplo con espacios) se convierten de a uno con int().
+    """
+    cantidad = len(lineas)
+    tiene_linea = np.array([linea is not None for linea in lineas], dtype=bool)
+    caracteres = (
+        np.array(
+            ["" if linea is None else linea for linea in lineas],
+            dtype=f"U{ANCHO_CAMPOS}",
+        )
+        .view(np.uint32)
+        .reshape(cantidad, ANCHO_CAMPOS)
+    )
+
+    columnas = {}
+    for col, inicio, fin in CAMPOS_MOVIMIENTO:
+        campo = caracteres[:, inicio:fin]
+        tipo = ESQUEMA_MOVIMIENTOS[col]
+
+        if tipo in ("category", "object"):
+            textos = np.ascontiguousarray(campo).view(f"U{fin - inicio}").ravel()
+            categorias, codigos = np.unique(textos, return_inverse=True)
+            if tipo == "category":
+                columnas[col] = pd.Categorical.from_codes(
+                    codigos.ravel(), categorias.tolist()
+                )
+            else:
+                columnas[col] = np.array(categorias.tolist(), dtype=object)[codigos.ravel()]
+            continue
+
+        digitos = campo.astype(np.int64) - ord("0")
+        valores = digitos @ 10 ** np.arange(fin - inicio - 1, -1, -1)
+        solo_digitos = ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+        for fila in np.flatnonzero(tiene_linea & ~solo_digitos):
+            valores[fila] = int(lineas[fila][inicio:fin])
+        valores[~tiene_linea] = 0
+        columnas[col] = valores.astype(tipo)
+
+    return columnas
+
+
+def unir_tandas_campos(tandas):
+    """Une en una columna por campo los campos extraídos de cada tanda de movimientos"""
+    columnas = {}
+    for col, _, _ in CAMPOS_MOVIMIENTO:
+        partes = [tanda[col] for tanda in tandas]
+        if ESQUEMA_MOVIMIENTOS[col] == "category":
+            # Categorías ordenadas, igual que las de np.unique en una sola tanda
+            columnas[col] = union_categoricals(partes, sort_categories=True)
+        else:
+            columnas[col] = np.concatenate(partes)
+    return columnas
+
+
+def construir_columnas_movimientos(movements):
+    """Acumula los movimientos (lista o generador de Movimiento) en columnas.
+
+    Los movimientos se consumen en tandas de MOVIMIENTOS_POR_TANDA: de cada
+    tanda se extraen los campos de identificación (extraer_campos_ancho_fijo)
+    y se anotan los montos, así que un generador no se materializa entero.
+    Los montos quedan como arrays int64 (cero donde el movimiento no trae la
+    columna), en orden de primera aparición y ya negativos en las notas de
+    crédito.
+    """
+    movements = iter(movements)
+    cantidad = 0
+    tandas = []
+
+    # Cada columna de montos (por índice) guarda solo las filas donde aparece
+    filas_por_columna = {}
+    while True:
+        tanda = list(islice(movements, MOVIMIENTOS_POR_TANDA))
+        if not tanda and tandas:
+            break
+        tandas.append(extraer_campos_ancho_fijo(list(map(attrgetter("linea"), tanda))))
+        for fila, movement in enumerate(tanda, cantidad):
+            for indice, valor in zip(movement.indices, movement.montos):
+                if indice not in filas_por_columna:
+                    filas_por_columna[indice] = (array("q"), array("q"))
+                filas, valores = filas_por_columna[indice]
+                filas.append(fila)
+                valores.append(valor)
+        cantidad += len(tanda)
+
+    columnas = unir_tandas_campos(tandas)
+    del tandas
+
+    es_nc = np.asarray(columnas["Comprobante"] == "NC")
+    for indice, (filas, valores) in filas_por_columna.items():
+        montos = np.zeros(cantidad, dtype="int64")
+        montos[np.frombuffer(filas, dtype=np.int64)] = np.frombuffer(valores, dtype=np.int64)
+        # Convertir notas de crédito a negativas
+        montos[es_nc] *= -1
+        columnas[COLUMNAS_MONTOS[indice]] = montos
+
+    return columnas
+
+
+def crear_dataframe_movimientos(movements):
+    """Crea el DataFrame de movimientos (montos en centavos enteros)"""
+    return pd.DataFrame(construir_columnas_movimientos(movements), copy=False)
+
+
+def combinar_movimientos_duplicados(df, solo_consecutivos=True):
+    """Combina movimientos que tienen la misma clave principal (Nro, PV, Razon Social).
+
+    Cada grupo conserva los datos de su primera fila y la suma de los montos.
+    Por defecto solo se combinan filas consecutivas; con solo_consecutivos=False
+    también se combinan las repetidas en otra parte del archivo (por ejemplo, una
+    factura partida por un salto de página), en el orden de su primera aparición.
+    """
+    claves = ["Nro", "PV", "Razon Social"]
+    montos = columnas_montos(df)
+
+    if solo_consecutivos:
+        # Un grupo nuevo empieza cada vez que cambia la clave respecto de la fila anterior
+        grupos = (df[claves] != df[claves].shift()).any(axis=1).cumsum()
+    else:
+        grupos = df.groupby(claves, sort=False, observed=True).ngroup()
+
+    resultado = df[~grupos.duplicated()].copy()
+    resultado[montos] = (
+        df[montos].groupby(grupos.to_numpy(), sort=False).sum().to_numpy()
+    )
+    return resultado
+
+
+def agregar_columna_total(df_final):
+    """Agrega la columna Total (suma de los montos de cada movimiento).
+
+    Un Total que ya exista no entra en la suma, así que volver a llamarla lo recalcula.
+    """
+    montos = [col for col in columnas_montos(df_final) if col != "Total"]
+    df_final["Total"] = df_final[montos].sum(axis=1)
+    return df_final
+
+
+def concatenar_movimientos(dataframes):
+    """Concatena en orden DataFrames de movimientos de un mismo libro (bloques o segmentos)"""
+    df = pd.concat(dataframes, ignore_index=True)
+
+    # Tasas que no aparecen en todas las partes y categorías distintas en cada una
+    montos = columnas_montos(df)
+    df[montos] = df[montos].fillna(0).astype("int64")
+    return aplicar_esquema_movimientos(df)
+
+
+def combinar_dataframes_archivos(dataframes, encabezados):
+    """Concatena los movimientos de varios libros, identificando cada fila con el PERIODO y el CUIT de su libro"""
+    partes = []
+    for df, encabezado in zip(dataframes, encabezados):
+        df = df.copy()
+        df.insert(0, "CUIT Libro", encabezado.get("CUIT", ""))
+        df.insert(0, "Periodo", encabezado.get("PERIODO", ""))
+        partes.append(df)
+
+    df_combinado = pd.concat(partes, ignore_index=True)
+
+    # Las tasas que no aparecen en un libro quedan en cero; Total va al final
+    montos = [col for col in columnas_montos(df_combinado) if col != "Total"]
+    if "Total" in df_combinado.columns:
+        montos.append("Total")
+    identificacion = [col for col in df_combinado.columns if col not in montos]
+    df_combinado = df_combinado[identificacion + montos]
+    df_combinado[montos] = df_combinado[montos].fillna(0).astype("int64")
+
+    # Las categorías de cada libro se unifican al concatenar
+    return aplicar_esquema_movimientos(df_combinado)
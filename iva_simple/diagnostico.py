@@ -0,0 +1,78 @@
+"""Medición de tiempo, filas y memoria por etapa del procesamiento."""
+
+import json
+import time
+import tracemalloc
+
+
+# ============================================================================
+# DIAGNÓSTICO DE RENDIMIENTO
+# ============================================================================
+
+
+class Diagnostico:
+    """Tiempo, cantidad de filas y pico de memoria de cada etapa del procesamiento.
+
+    Con memoria=True se activa tracemalloc entre iniciar() y finalizar(). El
+    rastreo es global al proceso: si hay otras sesiones procesando a la vez,
+    sus asignaciones también cuentan en el pico.
+    """
+
+    def __init__(self, memoria=False, contexto=None):
+        self.memoria = memoria
+        self.contexto = dict(contexto or {})
+        self.etapas = []
+        self.inicio_tracemalloc = False
+
+    def iniciar(self):
+        """Activa tracemalloc si corresponde y devuelve el instante actual"""
+        if self.memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.inicio_tracemalloc = True
+            tracemalloc.reset_peak()
+        return time.perf_counter()
+
+    def registrar(self, etapa, inicio, filas=None):
+        """Guarda la medición de una etapa y devuelve el instante actual"""
+        medicion = {
+            "etapa": etapa,
+            "segundos": round(time.perf_counter() - inicio, 4),
+            "filas": filas,
+        }
+        if self.memoria and tracemalloc.is_tracing():
+            medicion["pico_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.etapas.append(medicion)
+        return time.perf_counter()
+
+    def finalizar(self):
+        """Detiene tracemalloc si lo activó este diagnóstico"""
+        if self.inicio_tracemalloc:
+            tracemalloc.stop()
+            self.inicio_tracemalloc = False
+
+    def tiempos(self):
+        """Devuelve {etapa: segundos}"""
+        return {medicion["etapa"]: medicion["segundos"] for medicion in self.etapas}
+
+    def a_json_lines(self):
+        """Devuelve una línea JSON por etapa, con el contexto en cada una"""
+        return "".join(
+            json.dumps({**self.contexto, **medicion}, ensure_ascii=False) + "\n"
+            for medicion in self.etapas
+        )
+
+
+def iniciar_medicion(diagnostico):
+    """Inicia la medición si hay diagnóstico y devuelve el instante actual"""
+    if diagnostico is None:
+        return time.perf_counter()
+    return diagnostico.iniciar()
+
+
+def registrar_tiempo(diagnostico, etapa, inicio, filas=None):
+    """Registra una etapa en el diagnóstico (si se pidió) y devuelve el instante actual"""
+    if diagnostico is None:
+        return time.perf_counter()
+    return diagnostico.registrar(etapa, inicio, filas)
@@ -0,0 +1,84 @@
+"""Exportación de los movimientos a Excel (openpyxl se importa recién al usarla)."""
+
+import io
+import os
+import time
+
+from .montos import centavos_a_pesos, columnas_montos
+
+
+# ============================================================================
+# FUNCIONES DE EXCEL
+# ============================================================================
+
+FORMATO_MONEDA = '"$"#,##0.00'
+
+
+def crear_archivo_excel(df_final, directorio="."):
+    """Crea el archivo Excel Movimientos_<timestamp>.xlsx en directorio y devuelve su ruta"""
+    timestamp = int(time.time())
+    excel_filename = os.path.join(directorio, f"Movimientos_{timestamp}.xlsx")
+    escribir_excel(df_final, excel_filename)
+    return excel_filename
+
+
+def excel_en_bytes(df_final):
+    """Devuelve el contenido del archivo Excel de movimientos, sin escribirlo a disco"""
+    destino = io.BytesIO()
+    escribir_excel(df_final, destino)
+    return destino.getvalue()
+
+
+def escribir_excel(df_final, destino):
+    """Escribe el Excel solo con la hoja de movimientos en destino (ruta u objeto tipo archivo), en una sola pasada.
+
+    El libro es de solo escritura (las filas se vuelcan a disco a medida que se
+    agregan) y el formato de moneda se define una vez por columna de montos.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Movimientos")
+
+    columnas = list(df_final.columns)
+    montos = set(columnas_montos(df_final))
+
+    # Formato de moneda a nivel de columna (aplica también a celdas nuevas)
+    for col_idx, col in enumerate(columnas, start=1):
+        if col in montos:
+            ws.column_dimensions[get_column_letter(col_idx)].number_format = (
+                FORMATO_MONEDA
+            )
+
+    # Encabezado con el mismo estilo que usa pandas
+    borde = Side(style="thin")
+    encabezado = []
+    for col in columnas:
+        celda = WriteOnlyCell(ws, value=col)
+        celda.font = Font(bold=True)
+        celda.border = Border(top=borde, right=borde, bottom=borde, left=borde)
+        celda.alignment = Alignment(horizontal="center", vertical="top")
+        encabezado.append(celda)
+    ws.append(encabezado)
+
+    # Una celda con formato de moneda por columna de montos, reutilizada en cada
+    # fila: se serializa al agregarla, así que no hace falta una por valor
+    celdas_moneda = {}
+    for col_idx, col in enumerate(columnas):
+        if col in montos:
+            celda = WriteOnlyCell(ws)
+            celda.number_format = FORMATO_MONEDA
+            celdas_moneda[col_idx] = celda
+
+    # Filas de datos, con montos en pesos
+    for fila in centavos_a_pesos(df_final).itertuples(index=False, name=None):
+        valores = list(fila)
+        for col_idx, celda in celdas_moneda.items():
+            celda.value = valores[col_idx]
+            valores[col_idx] = celda
+        ws.append(valores)
+
+    wb.save(destino)
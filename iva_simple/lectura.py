@@ -0,0 +1,406 @@
+"""Lectura de los TXT de IVA y limpieza de sus líneas (sin pandas)."""
+
+import codecs
+import io
+import logging
+import mmap
+import os
+import re
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# FUNCIONES DE LECTURA Y LIMPIEZA DE ARCHIVOS
+# ============================================================================
+
+
+class ErrorTipoArchivo(ValueError):
+    """El archivo contiene movimientos de un tipo distinto al esperado"""
+
+    def __init__(self, detectado, esperado):
+        super().__init__(
+            f"El archivo contiene movimientos de {detectado} pero se esperaba {esperado}"
+        )
+        self.detectado = detectado
+        self.esperado = esperado
+
+    def __reduce__(self):
+        # Para que la excepción cruce procesos (pickle) con sus dos argumentos
+        return (ErrorTipoArchivo, (self.detectado, self.esperado))
+
+
+def es_ruta(fuente):
+    """Indica si la fuente es una ruta en disco (y no bytes o un objeto tipo archivo)"""
+    return isinstance(fuente, (str, os.PathLike))
+
+
+def leer_datos(fuente):
+    """Devuelve el contenido de bytes o de un objeto tipo archivo binario (como el de st.file_uploader)"""
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        return bytes(fuente)
+    if hasattr(fuente, "getvalue"):
+        return fuente.getvalue()
+    if hasattr(fuente, "seek"):
+        fuente.seek(0)
+    return fuente.read()
+
+
+# Bytes del principio del archivo sobre los que se detecta la codificación
+MUESTRA_CODIFICACION = 1 << 16
+
+
+@contextmanager
+def abrir_datos(fuente):
+    """Da acceso a los bytes de la fuente (ruta, bytes u objeto tipo archivo) sin copiarlos.
+
+    Una ruta en disco se mapea en memoria (mmap): el archivo no se copia
+    entero a la memoria del proceso, solo se leen las páginas que se usan y
+    los procesos que mapean el mismo archivo comparten la caché de páginas
+    del sistema. Los datos solo son válidos dentro del bloque with.
+    """
+    if not es_ruta(fuente):
+        yield leer_datos(fuente)
+        return
+
+    with open(fuente, "rb") as f:
+        # mmap no admite archivos vacíos
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            yield datos
+
+
+def detectar_codificacion(datos, muestra=MUESTRA_CODIFICACION):
+    """Devuelve "utf-8" si el principio de los datos es UTF-8 válido y "latin-1" si no.
+
+    Solo se valida una muestra de los primeros bytes (donde está el
+    encabezado, con la razón social); una línea posterior que no sea UTF-8
+    válido se decodifica igual como Latin-1 (decodificar_linea).
+    """
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    try:
+        # Sin final=True no falla si la muestra corta un carácter al medio
+        decodificador.decode(datos[:muestra], final=len(datos) <= muestra)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8"
+
+
+def decodificar_linea(linea, codificacion):
+    """Decodifica una línea con la codificación detectada, o como Latin-1 si no es válida en ella"""
+    try:
+        return linea.decode(codificacion)
+    except UnicodeDecodeError:
+        return linea.decode("latin-1")
+
+
+def iterar_lineas_bytes(datos, inicio=0, fin=None):
+    """Genera las líneas (con su salto de línea) de datos[inicio:fin], sin decodificar.
+
+    Lee con readline desde la posición de lectura del mmap (o de un BytesIO
+    sobre los bytes, que no los copia), así que no se deben recorrer dos
+    rangos del mismo mmap a la vez.
+    """
+    fin = len(datos) if fin is None else fin
+    if inicio >= fin:
+        return
+
+    lector = datos if isinstance(datos, mmap.mmap) else io.BytesIO(datos)
+    lector.seek(inicio)
+    posicion = inicio
+
+    for linea in iter(lector.readline, b""):
+        posicion += len(linea)
+        if posicion >= fin:
+            # La última línea del rango puede seguir después de fin
+            yield linea[: len(linea) - (posicion - fin)]
+            return
+        yield linea
+
+
+def leer_archivo(fuente):
+    """Lee el archivo (ruta, bytes u objeto tipo archivo) como una lista de líneas.
+
+    La codificación (UTF-8 o Latin-1) se detecta una sola vez, sobre el
+    principio del archivo, que se lee una sola vez.
+    """
+    with abrir_datos(fuente) as datos:
+        codificacion = detectar_codificacion(datos)
+        return [
+            decodificar_linea(linea, codificacion) for linea in iterar_lineas_bytes(datos)
+        ]
+
+
+def procesar_encabezado(lines):
+    """Procesa y extrae la información del encabezado del archivo"""
+    try:
+        encabezado = lines[1:7]
+        encabezado_limpio = [line.replace("\n", "").strip() for line in encabezado]
+
+        return {
+            "RAZON SOCIAL": encabezado_limpio[0],
+            "DIRECCION": encabezado_limpio[1],
+            "CUIT": encabezado_limpio[2],
+            "LIBRO": encabezado_limpio[3].split("  ")[-1],
+            "PERIODO": encabezado_limpio[4].split("  ")[-1],
+        }
+    except Exception as e:
+        logger.warning("Ocurrió un error al procesar el encabezado: %s", e)
+        return {}
+
+
+def crear_estado_parseo(tipo_esperado=None):
+    """Crea el estado compartido entre las etapas del pipeline en streaming.
+
+    "compras_o_ventas" lo completa la limpieza de líneas al detectar el tipo, y
+    "tipo_esperado" se valida contra él y se usa si no se detecta ninguno.
+    "fin_datos" indica que la limpieza encontró el final de los datos (y no
+    simplemente el final de las líneas recibidas).
+    """
+    return {"compras_o_ventas": "", "tipo_esperado": tipo_esperado, "fin_datos": False}
+
+
+# Secuencias ANSI y caracteres de control ASCII, en una sola expresión
+PATRON_ANSI_CONTROL = re.compile(r"\x1b[^m]*m|[\x00-\x1F\x7F]")
+PATRON_PIE_PAGINA = re.compile(r"PPag\.\:\s*\d+\s*$")
+
+
+def limpiar_caracteres_control(line):
+    """Elimina secuencias ANSI y caracteres de control de una línea"""
+    # La mayoría de las líneas solo tienen el salto de línea final: si sin él
+    # son imprimibles no hace falta pasar por la expresión regular
+    sin_salto = line.rstrip("\r\n")
+    if sin_salto.isprintable():
+        return sin_salto
+    return PATRON_ANSI_CONTROL.sub("", line)
+
+
+def registrar_tipo_detectado(estado, compras_o_ventas):
+    """Guarda el tipo detectado en el estado y lo valida contra el tipo esperado"""
+    estado["compras_o_ventas"] = compras_o_ventas
+    tipo_esperado = estado["tipo_esperado"]
+    if tipo_esperado and compras_o_ventas != tipo_esperado:
+        raise ErrorTipoArchivo(compras_o_ventas, tipo_esperado)
+
+
+def iterar_lineas_limpias(lineas_cuerpo, estado):
+    """Genera las líneas de datos del cuerpo (desde la línea 9) ya decodificado.
+
+    Elimina los bloques entre "----" y "--", los caracteres de control y los
+    pies de página "PPag.: N"; termina en "TOTALES POR TASA" o en la primera
+    línea corta que no sea un pie de página.
+    """
+    return limpiar_lineas_datos(filtrar_bloques(lineas_cuerpo, estado), estado)
+
+
+def filtrar_bloques(lineas_cuerpo, estado):
+    """Detecta el tipo, saltea los bloques entre "----" y "--" y termina en "TOTALES POR TASA".
+
+    Es la primera parte de la limpieza; iterar_lineas_datos hace lo mismo
+    sobre los bytes sin decodificar.
+    """
+    eliminar = False
+
+    for line in lineas_cuerpo:
+        # Detectar tipo de operación
+        if "IVA VENTAS" in line:
+            registrar_tipo_detectado(estado, "Ventas")
+        elif "IVA COMPRAS" in line:
+            registrar_tipo_detectado(estado, "Compras")
+
+        # Detectar fin de datos
+        if "TOTALES POR TASA" in line:
+            estado["fin_datos"] = True
+            return
+
+        # Manejar bloques a eliminar
+        if line.startswith("----"):
+            eliminar = True
+            continue
+
+        if line.startswith("--"):
+            eliminar = False
+            continue
+
+        if not eliminar:
+            yield line
+
+
+def limpiar_lineas_datos(lineas_datos, estado):
+    """Quita caracteres de control y pies de página de las líneas fuera de los bloques.
+
+    Termina en la primera línea corta que no sea un pie de página.
+    """
+    for line in lineas_datos:
+        cleaned_line = limpiar_caracteres_control(line)
+
+        # Pies de página: se quita "PPag.: N" y, si no queda nada más, se descarta
+        # la línea; cualquier otra línea corta marca el fin de los datos
+        if "PPag." in cleaned_line or len(cleaned_line.strip()) < 35:
+            cleaned_line, pies = PATRON_PIE_PAGINA.subn("", cleaned_line)
+            if not pies:
+                estado["fin_datos"] = True
+                return
+            if len(cleaned_line.strip()) < 35:
+                continue
+
+        yield cleaned_line
+
+
+def filtrar_bloques_bytes(datos, inicio, fin, codificacion, estado):
+    """Como filtrar_bloques, pero sobre las líneas de datos[inicio:fin] sin decodificar.
+
+    Los marcadores se buscan en los bytes, así que las líneas de los bloques
+    de encabezado de página y las que siguen a "TOTALES POR TASA" no se
+    decodifican; las demás se devuelven decodificadas.
+    """
+    eliminar = False
+
+    for linea in iterar_lineas_bytes(datos, inicio, fin):
+        if b"IVA VENTAS" in linea:
+            registrar_tipo_detectado(estado, "Ventas")
+        elif b"IVA COMPRAS" in linea:
+            registrar_tipo_detectado(estado, "Compras")
+
+        if b"TOTALES POR TASA" in linea:
+            estado["fin_datos"] = True
+            return
+
+        if linea.startswith(b"----"):
+            eliminar = True
+            continue
+
+        if linea.startswith(b"--"):
+            eliminar = False
+            continue
+
+        if not eliminar:
+            try:
+                yield linea.decode(codificacion)
+            except UnicodeDecodeError:
+                yield linea.decode("latin-1")
+
+
+def iterar_lineas_datos(datos, inicio, fin, codificacion, estado):
+    """Genera limpias las líneas de datos de datos[inicio:fin] (bytes o mmap), como iterar_lineas_limpias"""
+    return limpiar_lineas_datos(
+        filtrar_bloques_bytes(datos, inicio, fin, codificacion, estado), estado
+    )
+
+
+@contextmanager
+def abrir_libro(fuente, estado):
+    """Abre un libro para parsearlo en streaming y da (encabezado_completo, líneas de datos).
+
+    Las líneas de datos (iterar_lineas_datos desde la línea 9, ya limpias) se
+    leen a medida que se consumen, así que hay que consumirlas dentro del
+    bloque with.
+    """
+    with abrir_datos(fuente) as datos:
+        codificacion = detectar_codificacion(datos)
+        cuerpo = inicio_cuerpo(datos)
+        if cuerpo is None:
+            cuerpo = len(datos)
+
+        yield leer_encabezado(datos, cuerpo, codificacion), iterar_lineas_datos(
+            datos, cuerpo, len(datos), codificacion, estado
+        )
+
+
+def limpiar_lineas(lines):
+    """Limpia las líneas del archivo y devuelve las líneas de datos y el tipo detectado"""
+    estado = crear_estado_parseo()
+    cleaned_lines = list(iterar_lineas_limpias(lines[9:], estado))
+    return cleaned_lines, estado["compras_o_ventas"]
+
+
+# ============================================================================
+# SEGMENTOS DE PÁGINAS (PARSEO EN PARALELO DE UN LIBRO)
+# ============================================================================
+
+
+def inicio_cuerpo(datos):
+    """Posición en bytes de la línea 9, donde empiezan los datos (None si el libro es más corto)"""
+    posicion = 0
+    for _ in range(9):
+        posicion = datos.find(b"\n", posicion) + 1
+        if posicion == 0:
+            return None
+    return posicion
+
+
+def es_corte_seguro(datos, inicio, max_lineas=100):
+    """Indica si se puede empezar un segmento en el bloque "----" que empieza en inicio.
+
+    Es seguro si la primera línea de datos después del bloque es un movimiento
+    nuevo: si fuera una línea de continuación pertenecería al último
+    movimiento de la página anterior.
+    """
+    en_bloque = True
+    fin_linea = datos.find(b"\n", inicio)
+    for _ in range(max_lineas):
+        if fin_linea == -1:
+            return False
+        siguiente = fin_linea + 1
+        fin_linea = datos.find(b"\n", siguiente)
+        linea = datos[siguiente : fin_linea if fin_linea != -1 else len(datos)]
+        if linea.startswith(b"----"):
+            en_bloque = True
+        elif linea.startswith(b"--"):
+            en_bloque = False
+        elif not en_bloque:
+            # Los primeros caracteres son ASCII en UTF-8 y en Latin-1
+            return not limpiar_caracteres_control(linea.decode("latin-1")).startswith(
+                "  "
+            )
+    return False
+
+
+def buscar_segmentos_paginas(datos, partes):
+    """Divide el cuerpo del libro en hasta partes segmentos (inicio, fin) en bytes.
+
+    Los cortes caen al comienzo de un bloque de encabezado de página ("----")
+    cercano a tamaños iguales, y solo donde es_corte_seguro, así que cada
+    segmento se puede limpiar y parsear por separado. Devuelve [] si el libro
+    no tiene cuerpo.
+    """
+    cuerpo = inicio_cuerpo(datos)
+    if cuerpo is None:
+        return []
+
+    cortes = [cuerpo]
+    for i in range(1, partes):
+        objetivo = max(cuerpo + (len(datos) - cuerpo) * i // partes, cortes[-1] + 1)
+        posicion = datos.find(b"\n----", objetivo - 1)
+        while posicion != -1 and not es_corte_seguro(datos, posicion + 1):
+            posicion = datos.find(b"\n----", posicion + 1)
+        if posicion == -1:
+            break
+        cortes.append(posicion + 1)
+
+    return list(zip(cortes, cortes[1:] + [len(datos)]))
+
+
+def tipo_antes_de(datos, desde, hasta):
+    """Último tipo de movimientos ("Ventas"/"Compras") mencionado en datos[desde:hasta], o ""
+
+    Es el tipo que la limpieza en orden ya habría detectado al llegar a hasta.
+    """
+    ventas = datos.rfind(b"IVA VENTAS", desde, hasta)
+    compras = datos.rfind(b"IVA COMPRAS", desde, hasta)
+    if ventas == compras == -1:
+        return ""
+    return "Ventas" if ventas > compras else "Compras"
+
+
+def leer_encabezado(datos, cuerpo, codificacion):
+    """Procesa el encabezado a partir de las líneas de datos[0:cuerpo]"""
+    return procesar_encabezado(
+        [
+            decodificar_linea(linea, codificacion)
+            for linea in iterar_lineas_bytes(datos, 0, cuerpo)
+        ]
+    )
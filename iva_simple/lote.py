@@ -0,0 +1,549 @@
+"""Procesamiento por lotes de archivos TXT de IVA desde la línea de comandos.
+
+Ejemplo:
+
+    python -m iva_simple.lote libros/ --tipo Ventas --salida salida/ --procesos 8 \\
+        --actividades actividades.json
+
+(o python lote.py con los mismos argumentos). Por cada archivo se genera una
+carpeta en --salida con el Excel de movimientos y, para Ventas, los CSV de
+ARCA (los de Compras están en desarrollo). Al final se
+escribe resumen.json con el estado y los tiempos de cada archivo.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .arca import (
+    asignar_actividades_arca,
+    formatear_concepto_para_display,
+    generar_archivos_csv_arca,
+    guardar_archivos_csv_arca,
+    obtener_conceptos_unicos,
+    procesar_dataframe_para_arca,
+)
+from .bloques import TAMANIO_MINIMO_BLOQUE, procesar_por_bloques
+from .diagnostico import Diagnostico, iniciar_medicion, registrar_tiempo
+from .excel import crear_archivo_excel
+from .pipeline import parsear_archivo_con_parquet, parsear_archivo_por_paginas
+from .tasas import formato_arca
+
+
+# ============================================================================
+# ARMADO DEL LOTE
+# ============================================================================
+
+
+def expandir_entradas(entradas):
+    """Expande directorios y patrones glob a una lista ordenada de archivos TXT"""
+    archivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = [
+                os.path.join(entrada, nombre)
+                for nombre in os.listdir(entrada)
+                if nombre.lower().endswith(".txt")
+            ]
+        else:
+            encontrados = glob.glob(entrada)
+        for archivo in sorted(encontrados):
+            if os.path.isfile(archivo) and archivo not in archivos:
+                archivos.append(archivo)
+    return archivos
+
+
+def asignar_directorios_salida(archivos, directorio_salida):
+    """Asigna a cada archivo una carpeta de salida única según su nombre"""
+    usados = set()
+    directorios = []
+    for archivo in archivos:
+        base = os.path.splitext(os.path.basename(archivo))[0]
+        nombre = base
+        sufijo = 2
+        while nombre in usados:
+            nombre = f"{base}_{sufijo}"
+            sufijo += 1
+        usados.add(nombre)
+        directorios.append(os.path.join(directorio_salida, nombre))
+    return directorios
+
+
+def cargar_actividades(ruta):
+    """Carga el mapeo concepto -> código de actividad desde un archivo JSON"""
+    if not ruta:
+        return {}
+    with open(ruta, "r", encoding="utf-8") as f:
+        actividades = json.load(f)
+    return {str(k).strip(): str(v).strip() for k, v in actividades.items()}
+
+
+def mapear_actividades(conceptos, actividades, actividad_defecto=None):
+    """Arma actividad_por_concepto para los conceptos dados y devuelve también los que no tienen código"""
+    actividad_por_concepto = {}
+    conceptos_sin_codigo = []
+    for concepto in sorted(conceptos):
+        codigo = actividades.get(
+            formatear_concepto_para_display(concepto), actividad_defecto
+        )
+        if codigo:
+            actividad_por_concepto[concepto] = codigo
+        else:
+            conceptos_sin_codigo.append(formatear_concepto_para_display(concepto))
+    return actividad_por_concepto, conceptos_sin_codigo
+
+
+# ============================================================================
+# PROCESAMIENTO DE UN ARCHIVO (EJECUTADO EN LOS PROCESOS DEL POOL)
+# ============================================================================
+
+
+class ArchivoOmitido(Exception):
+    """El archivo no es un libro de IVA procesable; el mensaje es el motivo"""
+
+
+def verificar_libro(tipo, movimientos):
+    """Lanza ArchivoOmitido si el archivo no tiene movimientos o no tiene tipo.
+
+    tipo es el detectado en el archivo o, si no se detectó, el esperado (--tipo).
+    """
+    if not movimientos:
+        raise ArchivoOmitido("No se encontraron movimientos en el archivo")
+    if not tipo:
+        raise ArchivoOmitido(
+            "No se detectó si el archivo es de Ventas o de Compras (no parece un "
+            "libro de IVA); si lo es, indica el tipo con --tipo"
+        )
+
+
+def procesar_con_resumen(file_path, directorio, procesar, *args):
+    """Ejecuta procesar(resultado, diagnostico, *args) y devuelve la entrada del resumen.
+
+    Si procesar lanza ArchivoOmitido el archivo queda "omitido", sin Excel ni
+    CSV (el Parquet, si llegó a escribirse, se borra); cualquier otra excepción
+    queda como "error". En los dos casos la entrada de ARCA indica el motivo.
+    """
+    diagnostico = Diagnostico()
+    resultado = {
+        "archivo": file_path,
+        "directorio": directorio,
+        "estado": "ok",
+    }
+    inicio_total = time.perf_counter()
+
+    try:
+        procesar(resultado, diagnostico, *args)
+
+    except ArchivoOmitido as e:
+        resultado["estado"] = "omitido"
+        resultado["motivo"] = str(e)
+        resultado["arca"] = {"estado": "omitido", "motivo": str(e)}
+        ruta_parquet = resultado.pop("parquet", None)
+        if ruta_parquet and os.path.exists(ruta_parquet):
+            os.remove(ruta_parquet)
+        if os.path.isdir(directorio) and not os.listdir(directorio):
+            os.rmdir(directorio)
+
+    except Exception as e:
+        resultado["estado"] = "error"
+        resultado["error"] = f"{type(e).__name__}: {e}"
+        resultado["arca"] = {"estado": "omitido", "motivo": "Error al procesar el archivo"}
+
+    registrar_tiempo(diagnostico, "total", inicio_total)
+    resultado["tiempos"] = diagnostico.tiempos()
+    return resultado
+
+
+def generar_csv_arca_lote(
+    resultado,
+    diagnostico,
+    directorio,
+    tipo,
+    conceptos,
+    armar_salida,
+    actividades,
+    actividad_defecto,
+):
+    """Escribe los CSV de ARCA del libro y deja en resultado["arca"] su entrada del resumen.
+
+    armar_salida(actividad_por_concepto) devuelve el DataFrame para
+    generar_archivos_csv_arca; no se llama si el libro no genera CSV o si
+    faltan códigos de actividad.
+    """
+    if formato_arca(tipo) is None:
+        resultado["arca"] = arca_no_disponible(tipo)
+        return
+
+    inicio = iniciar_medicion(diagnostico)
+    actividad_por_concepto, conceptos_sin_codigo = mapear_actividades(
+        conceptos, actividades or {}, actividad_defecto
+    )
+    if conceptos_sin_codigo:
+        resultado["arca"] = {
+            "estado": "omitido",
+            "motivo": "Faltan códigos de actividad para los conceptos: "
+            + ", ".join(conceptos_sin_codigo),
+        }
+    else:
+        df_salida = armar_salida(actividad_por_concepto)
+        resultado["arca"] = escribir_csv_arca(df_salida, directorio, tipo)
+    registrar_tiempo(diagnostico, "arca", inicio)
+
+
+def procesar_archivo_lote(
+    file_path,
+    directorio,
+    tipo_esperado=None,
+    actividades=None,
+    actividad_defecto=None,
+    combinar_no_consecutivos=False,
+    parquet=False,
+    bloques=None,
+    procesos_paginas=1,
+):
+    """Procesa un archivo TXT y escribe sus artefactos; devuelve su entrada del resumen.
+
+    Con parquet=True los movimientos se guardan en movimientos.parquet dentro
+    del directorio, y si ya existe uno generado del mismo TXT no se vuelve a parsear.
+    Con bloques=N se procesa de a N movimientos (ver procesar_archivo_por_bloques).
+    Con procesos_paginas > 1 (None: cantidad de CPUs) el libro se parsea por
+    páginas en paralelo.
+    """
+    if bloques:
+        return procesar_archivo_por_bloques(
+            file_path, directorio, bloques, tipo_esperado, actividades, actividad_defecto
+        )
+
+    return procesar_con_resumen(
+        file_path,
+        directorio,
+        procesar_libro_completo,
+        file_path,
+        directorio,
+        tipo_esperado,
+        actividades,
+        actividad_defecto,
+        combinar_no_consecutivos,
+        parquet,
+        procesos_paginas,
+    )
+
+
+def procesar_libro_completo(
+    resultado,
+    diagnostico,
+    file_path,
+    directorio,
+    tipo_esperado,
+    actividades,
+    actividad_defecto,
+    combinar_no_consecutivos,
+    parquet,
+    procesos_paginas,
+):
+    """Parsea el libro entero y escribe el Excel y los CSV de ARCA (ver procesar_archivo_lote)"""
+    if parquet:
+        os.makedirs(directorio, exist_ok=True)
+        ruta_parquet = os.path.join(directorio, "movimientos.parquet")
+        df_final_sin_totales, encabezado, compras_o_ventas = parsear_archivo_con_parquet(
+            file_path,
+            ruta_parquet,
+            tipo_esperado,
+            diagnostico,
+            combinar_no_consecutivos,
+            procesos_paginas,
+        )
+        resultado["parquet"] = ruta_parquet
+    else:
+        df_final_sin_totales, encabezado, compras_o_ventas = parsear_archivo_por_paginas(
+            file_path,
+            tipo_esperado,
+            diagnostico,
+            combinar_no_consecutivos=combinar_no_consecutivos,
+            procesos=procesos_paginas,
+        )
+    tipo = compras_o_ventas or tipo_esperado
+    resultado["tipo"] = tipo
+    resultado["encabezado"] = encabezado
+    resultado["movimientos"] = len(df_final_sin_totales)
+    verificar_libro(tipo, resultado["movimientos"])
+
+    os.makedirs(directorio, exist_ok=True)
+
+    inicio = iniciar_medicion(diagnostico)
+    excel_filename = crear_archivo_excel(df_final_sin_totales, directorio)
+    registrar_tiempo(diagnostico, "excel", inicio, len(df_final_sin_totales))
+    resultado["excel"] = excel_filename
+
+    generar_csv_arca_lote(
+        resultado,
+        diagnostico,
+        directorio,
+        tipo,
+        obtener_conceptos_unicos(df_final_sin_totales),
+        lambda actividad_por_concepto: procesar_dataframe_para_arca(
+            df_final_sin_totales, actividad_por_concepto, tipo
+        ),
+        actividades,
+        actividad_defecto,
+    )
+
+
+def procesar_archivo_por_bloques(
+    file_path,
+    directorio,
+    bloques,
+    tipo_esperado=None,
+    actividades=None,
+    actividad_defecto=None,
+):
+    """Procesa un archivo de a bloques de movimientos, con memoria acotada.
+
+    No se arma el DataFrame completo, así que no se genera Excel ni Parquet:
+    solo los CSV de ARCA y los totales por columna (en centavos) en el resumen.
+    """
+    return procesar_con_resumen(
+        file_path,
+        directorio,
+        procesar_libro_por_bloques,
+        file_path,
+        directorio,
+        bloques,
+        tipo_esperado,
+        actividades,
+        actividad_defecto,
+    )
+
+
+def procesar_libro_por_bloques(
+    resultado,
+    diagnostico,
+    file_path,
+    directorio,
+    bloques,
+    tipo_esperado,
+    actividades,
+    actividad_defecto,
+):
+    """Reduce el libro de a bloques y escribe los CSV de ARCA (ver procesar_archivo_por_bloques)"""
+    parcial, encabezado, compras_o_ventas = procesar_por_bloques(
+        file_path, tipo_esperado, bloques, diagnostico
+    )
+    tipo = compras_o_ventas or tipo_esperado
+    resultado["tipo"] = tipo
+    resultado["encabezado"] = encabezado
+    resultado["movimientos"] = parcial["movimientos"]
+    resultado["totales_centavos"] = parcial["totales"]
+    verificar_libro(tipo, resultado["movimientos"])
+
+    os.makedirs(directorio, exist_ok=True)
+
+    generar_csv_arca_lote(
+        resultado,
+        diagnostico,
+        directorio,
+        tipo,
+        parcial["conceptos"],
+        lambda actividad_por_concepto: asignar_actividades_arca(
+            parcial["preagregado"], actividad_por_concepto
+        ),
+        actividades,
+        actividad_defecto,
+    )
+
+
+def arca_no_disponible(tipo):
+    """Entrada del resumen para un libro que no genera CSV de ARCA"""
+    return {
+        "estado": "omitido",
+        "motivo": f"La generación de archivos para ARCA de {tipo} está en desarrollo",
+    }
+
+
+def escribir_csv_arca(df_salida, directorio, tipo):
+    """Genera y guarda los CSV de ARCA; devuelve su entrada del resumen"""
+    csv_nc, csv_otros, df_nc_agrupado, df_otros_agrupado = generar_archivos_csv_arca(
+        df_salida, tipo
+    )
+    nombre_nc, nombre_otros = guardar_archivos_csv_arca(
+        csv_nc, csv_otros, directorio, tipo
+    )
+    return {
+        "estado": "ok",
+        "archivo_rf": nombre_nc,
+        "archivo_df": nombre_otros,
+        "filas_rf": len(df_nc_agrupado),
+        "filas_df": len(df_otros_agrupado),
+    }
+
+
+# ============================================================================
+# EJECUCIÓN DEL LOTE
+# ============================================================================
+
+
+def procesar_lote(
+    archivos,
+    directorio_salida,
+    tipo_esperado=None,
+    actividades=None,
+    actividad_defecto=None,
+    procesos=None,
+    combinar_no_consecutivos=False,
+    parquet=False,
+    bloques=None,
+):
+    """Procesa los archivos en un pool de procesos y devuelve el resumen en el orden de entrada.
+
+    Un solo archivo se procesa en este proceso, con el pool parseándolo por páginas.
+    """
+    directorios = asignar_directorios_salida(archivos, directorio_salida)
+
+    if len(archivos) == 1:
+        resultado = procesar_archivo_lote(
+            archivos[0],
+            directorios[0],
+            tipo_esperado,
+            actividades,
+            actividad_defecto,
+            combinar_no_consecutivos,
+            parquet,
+            bloques,
+            procesos,
+        )
+        print(
+            f"[1/1] {resultado['estado']:7s} {archivos[0]} "
+            f"({resultado['tiempos']['total']:.2f}s)",
+            file=sys.stderr,
+        )
+        return [resultado]
+
+    resultados = [None] * len(archivos)
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(
+                procesar_archivo_lote,
+                archivo,
+                directorio,
+                tipo_esperado,
+                actividades,
+                actividad_defecto,
+                combinar_no_consecutivos,
+                parquet,
+                bloques,
+            ): i
+            for i, (archivo, directorio) in enumerate(zip(archivos, directorios))
+        }
+        for completados, futuro in enumerate(as_completed(futuros), start=1):
+            i = futuros[futuro]
+            resultados[i] = futuro.result()
+            print(
+                f"[{completados}/{len(archivos)}] {resultados[i]['estado']:7s} "
+                f"{archivos[i]} ({resultados[i]['tiempos']['total']:.2f}s)",
+                file=sys.stderr,
+            )
+
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Procesa en lote archivos TXT de movimientos de IVA y genera Excel y CSV para ARCA."
+    )
+    parser.add_argument(
+        "entradas", nargs="+", help="Directorios o patrones glob de archivos TXT"
+    )
+    parser.add_argument(
+        "--salida", default="salida", help="Directorio de salida (default: salida)"
+    )
+    parser.add_argument(
+        "--tipo",
+        choices=["Ventas", "Compras"],
+        help="Tipo de movimientos esperado; si se omite se detecta en cada archivo",
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=None,
+        help="Cantidad de procesos del pool (default: cantidad de CPUs); con un solo "
+        "archivo, se usan para parsearlo por páginas",
+    )
+    parser.add_argument(
+        "--actividades",
+        help="JSON con el código de actividad por concepto, ej. {\"1\": \"620100\"}",
+    )
+    parser.add_argument(
+        "--actividad-defecto",
+        help="Código de actividad para los conceptos que no están en --actividades",
+    )
+    parser.add_argument(
+        "--combinar-no-consecutivos",
+        action="store_true",
+        help="Combinar también comprobantes repetidos que no están en filas consecutivas",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Guardar los movimientos en movimientos.parquet y reutilizarlo si el TXT no cambió",
+    )
+    parser.add_argument(
+        "--bloques",
+        type=int,
+        help="Procesar de a N movimientos (al menos 1000) con memoria acotada (sin "
+        "Excel ni Parquet; solo CSV de ARCA y totales)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.bloques is not None and args.bloques < TAMANIO_MINIMO_BLOQUE:
+        parser.error(f"--bloques debe ser de al menos {TAMANIO_MINIMO_BLOQUE}")
+    if args.bloques and (args.parquet or args.combinar_no_consecutivos):
+        parser.error(
+            "--bloques no se puede combinar con --parquet ni con --combinar-no-consecutivos"
+        )
+
+    archivos = expandir_entradas(args.entradas)
+    if not archivos:
+        parser.error("No se encontraron archivos TXT en las entradas indicadas")
+
+    os.makedirs(args.salida, exist_ok=True)
+    inicio = time.perf_counter()
+    resultados = procesar_lote(
+        archivos,
+        args.salida,
+        args.tipo,
+        cargar_actividades(args.actividades),
+        args.actividad_defecto,
+        args.procesos,
+        args.combinar_no_consecutivos,
+        args.parquet,
+        args.bloques,
+    )
+
+    resumen = {
+        "archivos": len(resultados),
+        "ok": sum(1 for r in resultados if r["estado"] == "ok"),
+        "omitidos": sum(1 for r in resultados if r["estado"] == "omitido"),
+        "errores": sum(1 for r in resultados if r["estado"] == "error"),
+        "tiempo_total": round(time.perf_counter() - inicio, 4),
+        "resultados": resultados,
+    }
+    ruta_resumen = os.path.join(args.salida, "resumen.json")
+    with open(ruta_resumen, "w", encoding="utf-8") as f:
+        json.dump(resumen, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"{resumen['ok']} de {resumen['archivos']} archivos procesados en "
+        f"{resumen['tiempo_total']:.2f}s ({resumen['omitidos']} omitidos). "
+        f"Resumen: {ruta_resumen}",
+        file=sys.stderr,
+    )
+    return 1 if resumen["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Montos en centavos enteros: lectura desde el TXT y conversión para mostrar o exportar."""
+
+import re
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+
+# ============================================================================
+# FUNCIONES DE MONTOS EN CENTAVOS
+# ============================================================================
+
+# Columnas de identificación del movimiento; todas las demás son montos
+COLUMNAS_ENCABEZADO_MOVIMIENTO = [
+    "Fecha",
+    "Comprobante",
+    "PV",
+    "Nro",
+    "Letra",
+    "Razon Social",
+    "Condicion",
+    "CUIT",
+    "Concepto",
+    "Jurisdiccion",
+]
+
+# Columnas que identifican el libro de origen en la vista consolidada de varios archivos
+COLUMNAS_ORIGEN = ["Periodo", "CUIT Libro"]
+
+PATRON_MONTO = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
+
+
+def texto_a_centavos(texto):
+    """Convierte un monto del TXT ("1234,56") a centavos enteros.
+
+    El redondeo a 2 decimales es ROUND_HALF_UP sobre el texto, sin pasar por
+    float; si el texto no es un número devuelve 0.
+    """
+    texto = str(texto).strip().replace(",", ".")
+    coincidencia = PATRON_MONTO.fullmatch(texto)
+
+    if coincidencia is None or not (coincidencia.group(2) or coincidencia.group(3)):
+        # Formatos poco comunes (exponentes, etc.): resolver con Decimal
+        try:
+            valor = Decimal(texto)
+        except InvalidOperation:
+            return 0
+        if not valor.is_finite():
+            return 0
+        return int(valor.scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    signo, entero, decimales = coincidencia.groups()
+    decimales = decimales or ""
+    centavos = int(entero or "0") * 100 + int(decimales[:2].ljust(2, "0"))
+    if len(decimales) > 2 and decimales[2] >= "5":
+        centavos += 1
+
+    return -centavos if signo == "-" else centavos
+
+
+def columnas_montos(df):
+    """Devuelve las columnas de montos (en centavos) del DataFrame de movimientos"""
+    return [
+        col
+        for col in df.columns
+        if col not in COLUMNAS_ENCABEZADO_MOVIMIENTO and col not in COLUMNAS_ORIGEN
+    ]
+
+
+def centavos_a_pesos(df):
+    """Devuelve una copia del DataFrame con las columnas de montos en pesos (float)"""
+    df = df.copy()
+    montos = columnas_montos(df)
+    # astype densifica las columnas dispersas
+    df[montos] = df[montos].astype("int64") / 100
+    return df
+
+
+def centavos_a_texto(serie, separador_decimal=","):
+    """Formatea una serie de centavos enteros como texto con 2 decimales ("1234,56"), dejando vacíos los ceros"""
+    serie = serie.astype("int64")
+    absoluto = serie.abs()
+    texto = (
+        (absoluto // 100).astype(str)
+        + separador_decimal
+        + (absoluto % 100).astype(str).str.zfill(2)
+    )
+    texto = texto.where(serie >= 0, "-" + texto)
+    return texto.where(serie != 0, "")
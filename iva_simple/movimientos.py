@@ -0,0 +1,187 @@
+"""Parseo de las líneas limpias en movimientos (registros con montos en centavos, sin pandas)."""
+
+import re
+import threading
+
+from .lectura import crear_estado_parseo
+from .montos import texto_a_centavos
+from .tasas import COLUMNAS_NETO_IVA, LIBROS, libro_de
+
+
+# ============================================================================
+# REGISTRO DE MOVIMIENTO
+# ============================================================================
+
+# Columna del DataFrame y posición [inicio, fin) de cada campo de ancho fijo
+# de la línea principal del movimiento
+CAMPOS_MOVIMIENTO = [
+    ("Fecha", 0, 2),
+    ("Comprobante", 3, 5),
+    ("PV", 6, 11),
+    ("Nro", 12, 20),
+    ("Letra", 20, 21),
+    ("Razon Social", 22, 44),
+    ("Condicion", 45, 49),
+    ("CUIT", 50, 63),
+    ("Concepto", 64, 67),
+    ("Jurisdiccion", 68, 69),
+]
+
+# Ancho de la parte de la línea principal que ocupan los campos
+ANCHO_CAMPOS = max(fin for _, _, fin in CAMPOS_MOVIMIENTO)
+
+
+# ============================================================================
+# ÍNDICE DE LAS COLUMNAS DE MONTOS
+# ============================================================================
+
+# Nombre de cada columna de montos por su índice, e índice por nombre. Las
+# columnas de la tabla de tasas se registran al importar; una tasa que no
+# figura en la tabla se registra la primera vez que aparece (el registro es
+# del proceso y solo crece, así que los índices no cambian).
+COLUMNAS_MONTOS = []
+INDICE_COLUMNA_MONTOS = {}
+BLOQUEO_COLUMNAS_MONTOS = threading.Lock()
+
+
+def indice_columna_montos(col):
+    """Índice de la columna de montos col, registrándola si es nueva"""
+    indice = INDICE_COLUMNA_MONTOS.get(col)
+    if indice is None:
+        # Las sesiones de la app parsean en hilos distintos
+        with BLOQUEO_COLUMNAS_MONTOS:
+            indice = INDICE_COLUMNA_MONTOS.get(col)
+            if indice is None:
+                indice = len(COLUMNAS_MONTOS)
+                COLUMNAS_MONTOS.append(col)
+                INDICE_COLUMNA_MONTOS[col] = indice
+    return indice
+
+
+# tasa -> (índice de la columna Neto, índice de la columna IVA), por libro
+INDICES_NETO_IVA = {
+    libro: {
+        tasa: (indice_columna_montos(neto), indice_columna_montos(iva))
+        for tasa, (neto, iva) in COLUMNAS_NETO_IVA[libro].items()
+    }
+    for libro in LIBROS
+}
+
+
+class Movimiento:
+    """Un movimiento del libro: su línea principal y los montos en centavos por columna.
+
+    Los campos de ancho fijo no se separan acá: se extraen de las líneas de
+    todos los movimientos juntos al armar las columnas. linea queda en None si
+    la línea principal no se pudo parsear. indices y montos son listas
+    paralelas con el índice de cada columna de montos que aparece en el
+    movimiento (ver COLUMNAS_MONTOS), en orden de aparición, y su total en
+    centavos.
+    """
+
+    __slots__ = ("linea", "indices", "montos")
+
+    def __init__(self):
+        self.linea = None
+        self.indices = []
+        self.montos = []
+
+    def vacio(self):
+        """Indica si el movimiento no tiene línea principal ni montos"""
+        return self.linea is None and not self.indices
+
+
+# ============================================================================
+# FUNCIONES DE PROCESAMIENTO DE MOVIMIENTOS
+# ============================================================================
+
+# Separador de la tasa y los montos en la sección desde la columna 70
+PATRON_SEPARADOR_MONTOS = re.compile(r"\s{3,}")
+
+
+def iterar_movimientos(cleaned_lines, estado):
+    """Genera los movimientos de a uno a medida que se completan.
+
+    El tipo (compras_o_ventas) se toma del estado en cada línea porque en
+    streaming se detecta mientras se limpian las líneas.
+    """
+    temp_movement = Movimiento()
+    primero = True
+    hay_lineas = False
+
+    for cleaned_line in cleaned_lines:
+        hay_lineas = True
+        compras_o_ventas = estado["compras_o_ventas"] or estado["tipo_esperado"]
+
+        # Procesar líneas continuas del mismo movimiento
+        if cleaned_line[0:2] == "  ":
+            procesar_linea_continuacion(cleaned_line, temp_movement, compras_o_ventas)
+        else:
+            # Nueva entrada de movimiento: el anterior ya está completo
+            # (se descarta el movimiento vacío inicial)
+            if not primero or not temp_movement.vacio():
+                yield temp_movement
+            primero = False
+            temp_movement = Movimiento()
+
+            procesar_nueva_entrada(cleaned_line, temp_movement, compras_o_ventas)
+
+    if hay_lineas:
+        yield temp_movement
+
+
+def procesar_movimientos(cleaned_lines, compras_o_ventas):
+    """Procesa las líneas limpias y extrae los movimientos"""
+    estado = crear_estado_parseo()
+    estado["compras_o_ventas"] = compras_o_ventas
+    return list(iterar_movimientos(cleaned_lines, estado))
+
+
+def procesar_linea_continuacion(cleaned_line, temp_movement, compras_o_ventas):
+    """Procesa una línea que continúa un movimiento existente"""
+    partes = PATRON_SEPARADOR_MONTOS.split(cleaned_line[70:])
+    if len(partes) < 2:
+        return
+
+    sumar_montos_tasa(partes, temp_movement, compras_o_ventas)
+
+
+def sumar_monto(temp_movement, indice, texto):
+    """Suma un monto del TXT (en centavos) a la columna de montos indice del movimiento"""
+    indices = temp_movement.indices
+    if indice in indices:
+        temp_movement.montos[indices.index(indice)] += texto_a_centavos(texto)
+    else:
+        indices.append(indice)
+        temp_movement.montos.append(texto_a_centavos(texto))
+
+
+def sumar_montos_tasa(partes, temp_movement, compras_o_ventas):
+    """Suma los montos de una tasa en sus columnas según la tabla de tasas del libro"""
+    tasa = partes[0]
+    indices = INDICES_NETO_IVA[libro_de(compras_o_ventas)].get(tasa)
+    if indices is None:
+        sumar_monto(temp_movement, indice_columna_montos(tasa), partes[1])
+    else:
+        sumar_monto(temp_movement, indices[0], partes[1])
+        sumar_monto(temp_movement, indices[1], partes[2])
+
+
+def procesar_nueva_entrada(cleaned_line, temp_movement, compras_o_ventas):
+    """Procesa una nueva entrada de movimiento"""
+    partes = PATRON_SEPARADOR_MONTOS.split(cleaned_line[70:])
+    if len(partes) < 2:
+        return
+
+    # Los campos de ancho fijo se extraen después, en columnas
+    temp_movement.linea = cleaned_line
+
+    # Procesar montos
+    if len(partes) == 3:
+        primer_monto = partes[1].split(" ")
+        primer_monto = list(filter(None, primer_monto))
+        segundo_monto = partes[1].split(" ")
+        segundo_monto = list(filter(None, segundo_monto))
+        partes = [partes[0]] + primer_monto + segundo_monto
+
+    sumar_montos_tasa(partes, temp_movement, compras_o_ventas)
@@ -0,0 +1,73 @@
+"""Exportación y lectura de los movimientos en Parquet (pyarrow se importa recién al usarlo)."""
+
+import json
+
+from .cache import VERSION_PARSER
+from .dataframes import densificar_montos
+from .lectura import es_ruta, leer_datos
+
+
+# ============================================================================
+# EXPORTACIÓN COLUMNAR (PARQUET)
+# ============================================================================
+
+# Clave de los metadatos propios en el esquema del Parquet
+CLAVE_METADATOS_PARQUET = b"iva_simple"
+
+
+def movimientos_a_parquet(df_final_sin_totales, encabezado, destino=None, **metadatos):
+    """Escribe los movimientos (montos en centavos) y el encabezado en Parquet.
+
+    Los metadatos (encabezado, versión del parser y los que se pasen, como la
+    clave de caché del TXT de origen) van en el esquema del archivo. Sin
+    destino devuelve los bytes del Parquet.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Parquet no admite columnas dispersas; las categorías se guardan como diccionario
+    tabla = pa.Table.from_pandas(
+        densificar_montos(df_final_sin_totales), preserve_index=False
+    )
+    propios = {"encabezado": encabezado, "version_parser": VERSION_PARSER, **metadatos}
+    tabla = tabla.replace_schema_metadata(
+        {
+            **(tabla.schema.metadata or {}),
+            CLAVE_METADATOS_PARQUET: json.dumps(propios, ensure_ascii=False).encode(
+                "utf-8"
+            ),
+        }
+    )
+
+    if destino is None:
+        buffer = pa.BufferOutputStream()
+        pq.write_table(tabla, buffer, compression="zstd")
+        return buffer.getvalue().to_pybytes()
+
+    pq.write_table(tabla, destino, compression="zstd")
+    return destino
+
+
+def leer_metadatos_parquet(fuente):
+    """Lee solo los metadatos propios de un Parquet de movimientos (sin cargar los datos)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not es_ruta(fuente):
+        fuente = pa.BufferReader(leer_datos(fuente))
+    metadatos = pq.read_schema(fuente).metadata or {}
+    return json.loads(metadatos.get(CLAVE_METADATOS_PARQUET, b"{}"))
+
+
+def leer_movimientos_parquet(fuente):
+    """Lee un Parquet de movimientos (ruta, bytes u objeto tipo archivo); devuelve (df, metadatos)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not es_ruta(fuente):
+        fuente = pa.BufferReader(leer_datos(fuente))
+    tabla = pq.read_table(fuente)
+    metadatos = json.loads(
+        (tabla.schema.metadata or {}).get(CLAVE_METADATOS_PARQUET, b"{}")
+    )
+    return tabla.to_pandas(), metadatos
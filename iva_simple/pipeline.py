@@ -0,0 +1,329 @@
+"""Pipeline de parseo completo: de un TXT (ruta, bytes u objeto tipo archivo) al DataFrame de movimientos."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import clave_cache
+from .dataframes import (
+    agregar_columna_total,
+    combinar_movimientos_duplicados,
+    compactar_montos_dispersos,
+    concatenar_movimientos,
+    crear_dataframe_movimientos,
+)
+from .diagnostico import iniciar_medicion, registrar_tiempo
+from .lectura import (
+    ErrorTipoArchivo,
+    abrir_datos,
+    abrir_libro,
+    buscar_segmentos_paginas,
+    crear_estado_parseo,
+    detectar_codificacion,
+    es_ruta,
+    iterar_lineas_datos,
+    leer_archivo,
+    leer_encabezado,
+    limpiar_lineas,
+    procesar_encabezado,
+    tipo_antes_de,
+)
+from .movimientos import iterar_movimientos, procesar_movimientos
+from .parquet import (
+    leer_metadatos_parquet,
+    leer_movimientos_parquet,
+    movimientos_a_parquet,
+)
+
+
+# ============================================================================
+# PIPELINE DE PARSEO
+# ============================================================================
+
+
+def parsear_archivo(
+    fuente,
+    tipo_esperado=None,
+    diagnostico=None,
+    streaming=False,
+    combinar_no_consecutivos=False,
+    montos_dispersos=False,
+):
+    """Ejecuta el pipeline de parseo sin interfaz.
+
+    La fuente puede ser una ruta, bytes o un objeto tipo archivo binario.
+    Devuelve (df_final_sin_totales, encabezado_completo, compras_o_ventas), donde
+    compras_o_ventas es el tipo detectado en el archivo ("" si no se pudo detectar).
+    Lanza ErrorTipoArchivo si el tipo detectado no coincide con tipo_esperado.
+
+    Con streaming=True la lectura, la limpieza y el parseo se encadenan como
+    generadores sobre el archivo mapeado en memoria (abrir_libro), de modo que
+    no hay una copia de todas las líneas en memoria; el tiempo de lectura,
+    limpieza, parseo y armado del DataFrame se registra junto en la etapa
+    "movimientos".
+
+    Con combinar_no_consecutivos=True se combinan también los comprobantes
+    repetidos que no están en filas consecutivas.
+
+    Con montos_dispersos=True las columnas de montos casi siempre en cero (tasas
+    poco usadas) se devuelven dispersas, para ocupar menos memoria en caché.
+
+    Si se pasa un Diagnostico, se registran en él el tiempo, las filas y el
+    pico de memoria de cada etapa.
+    """
+    inicio = iniciar_medicion(diagnostico)
+
+    if streaming:
+        estado = crear_estado_parseo(tipo_esperado)
+        with abrir_libro(fuente, estado) as (encabezado_completo, lineas):
+            movements = iterar_movimientos(lineas, estado)
+            df = crear_dataframe_movimientos(movements)
+        compras_o_ventas = estado["compras_o_ventas"]
+        inicio = registrar_tiempo(diagnostico, "movimientos", inicio, len(df))
+    else:
+        # 1. Leer y limpiar archivo
+        lines = leer_archivo(fuente)
+        inicio = registrar_tiempo(diagnostico, "lectura", inicio, len(lines))
+        encabezado_completo = procesar_encabezado(lines)
+        cleaned_lines, compras_o_ventas = limpiar_lineas(lines)
+
+        inicio = registrar_tiempo(
+            diagnostico, "limpieza", inicio, len(cleaned_lines)
+        )
+
+        # 2. Validar que el tipo de archivo coincida con la selección
+        if tipo_esperado and compras_o_ventas and compras_o_ventas != tipo_esperado:
+            raise ErrorTipoArchivo(compras_o_ventas, tipo_esperado)
+
+        # 3. Procesar movimientos (si no se detectó el tipo, usar el esperado)
+        movements = procesar_movimientos(
+            cleaned_lines, compras_o_ventas or tipo_esperado
+        )
+        inicio = registrar_tiempo(
+            diagnostico, "movimientos", inicio, len(movements)
+        )
+
+        # 4. Crear DataFrames
+        df = crear_dataframe_movimientos(movements)
+        inicio = registrar_tiempo(diagnostico, "dataframe", inicio, len(df))
+
+    df_final_sin_totales = completar_movimientos(
+        df, inicio, diagnostico, combinar_no_consecutivos, montos_dispersos
+    )
+    return df_final_sin_totales, encabezado_completo, compras_o_ventas
+
+
+def completar_movimientos(
+    df, inicio, diagnostico=None, combinar_no_consecutivos=False, montos_dispersos=False
+):
+    """Combina los movimientos repetidos y agrega la columna Total (pasos 4 y 5 del pipeline)"""
+    df_final = combinar_movimientos_duplicados(
+        df, solo_consecutivos=not combinar_no_consecutivos
+    )
+    inicio = registrar_tiempo(diagnostico, "combinacion", inicio, len(df_final))
+
+    # 5. Total por movimiento
+    df_final_sin_totales = agregar_columna_total(df_final)
+    if montos_dispersos:
+        df_final_sin_totales = compactar_montos_dispersos(df_final_sin_totales)
+    registrar_tiempo(diagnostico, "totales", inicio, len(df_final_sin_totales))
+
+    return df_final_sin_totales
+
+
+def parsear_archivo_con_parquet(
+    file_path,
+    ruta_parquet,
+    tipo_esperado=None,
+    diagnostico=None,
+    combinar_no_consecutivos=False,
+    procesos=1,
+):
+    """Como parsear_archivo, pero reutiliza ruta_parquet si se generó del mismo TXT.
+
+    El Parquet se reutiliza si su clave (contenido del TXT, tipo, opciones y
+    versión del parser) coincide con la del archivo; si no existe o no
+    coincide, se parsea el TXT (por páginas en paralelo si procesos > 1) y se
+    (re)escribe el Parquet.
+    """
+    inicio = iniciar_medicion(diagnostico)
+    with abrir_datos(file_path) as datos:
+        clave = clave_cache(datos, tipo_esperado, combinar_no_consecutivos)
+
+    if os.path.exists(ruta_parquet):
+        try:
+            vigente = leer_metadatos_parquet(ruta_parquet).get("clave") == clave
+        except (OSError, ValueError):
+            vigente = False
+        if vigente:
+            df, metadatos = leer_movimientos_parquet(ruta_parquet)
+            registrar_tiempo(diagnostico, "parquet", inicio, len(df))
+            return df, metadatos["encabezado"], metadatos["compras_o_ventas"]
+
+    df_final_sin_totales, encabezado_completo, compras_o_ventas = (
+        parsear_archivo_por_paginas(
+            file_path,
+            tipo_esperado,
+            diagnostico,
+            combinar_no_consecutivos=combinar_no_consecutivos,
+            procesos=procesos,
+        )
+    )
+    movimientos_a_parquet(
+        df_final_sin_totales,
+        encabezado_completo,
+        ruta_parquet,
+        clave=clave,
+        compras_o_ventas=compras_o_ventas,
+    )
+    return df_final_sin_totales, encabezado_completo, compras_o_ventas
+
+
+def parsear_archivos_en_paralelo(
+    fuentes,
+    tipo_esperado=None,
+    combinar_no_consecutivos=False,
+    procesos=None,
+    montos_dispersos=False,
+):
+    """Parsea varias fuentes en un pool de procesos (una por proceso a la vez).
+
+    Devuelve, en el orden de entrada, una tupla (resultado, error) por fuente:
+    resultado es lo que devuelve parsear_archivo y error la excepción que lanzó
+    (uno de los dos es None).
+    """
+    procesos = procesos or min(len(fuentes), os.cpu_count() or 1)
+    resultados = []
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [
+            pool.submit(
+                parsear_archivo,
+                fuente,
+                tipo_esperado,
+                None,
+                True,
+                combinar_no_consecutivos,
+                montos_dispersos,
+            )
+            for fuente in fuentes
+        ]
+        for futuro in futuros:
+            try:
+                resultados.append((futuro.result(), None))
+            except Exception as e:
+                resultados.append((None, e))
+
+    return resultados
+
+
+# ============================================================================
+# PARSEO EN PARALELO DE UN LIBRO POR PÁGINAS
+# ============================================================================
+
+# Por debajo de este tamaño el costo del pool supera lo que se gana en paralelo
+TAMANIO_MINIMO_POR_PAGINAS = 8 * 1024 * 1024
+
+
+def parsear_segmento(fuente, inicio, fin, codificacion, tipo_esperado, tipo_inicial):
+    """Limpia y parsea los bytes [inicio, fin) de un libro (en un proceso del pool).
+
+    tipo_inicial es el tipo que la limpieza ya habría detectado antes del
+    segmento. Devuelve (df, compras_o_ventas, fin_datos), con df None si el
+    segmento no tiene movimientos; fin_datos indica que el segmento llegó al
+    final de los datos y lo que sigue no se procesa.
+    """
+    estado = crear_estado_parseo(tipo_esperado)
+    estado["compras_o_ventas"] = tipo_inicial
+    with abrir_datos(fuente) as datos:
+        lineas = iterar_lineas_datos(datos, inicio, fin, codificacion, estado)
+        movements = list(iterar_movimientos(lineas, estado))
+    df = crear_dataframe_movimientos(movements) if movements else None
+    return df, estado["compras_o_ventas"], estado["fin_datos"]
+
+
+def parsear_archivo_por_paginas(
+    fuente,
+    tipo_esperado=None,
+    diagnostico=None,
+    combinar_no_consecutivos=False,
+    montos_dispersos=False,
+    procesos=None,
+    tamanio_minimo=TAMANIO_MINIMO_POR_PAGINAS,
+):
+    """Como parsear_archivo, pero parsea un solo libro en paralelo, partido por páginas.
+
+    El cuerpo se corta en bloques de encabezado de página donde la página
+    siguiente empieza con un movimiento nuevo (buscar_segmentos_paginas): un
+    movimiento con líneas de continuación en la página siguiente nunca queda
+    partido entre dos segmentos. Cada segmento se limpia y se parsea en un
+    proceso del pool, y los resultados se concatenan en orden; los comprobantes
+    repetidos a ambos lados de un corte se combinan después, sobre el libro
+    completo. Para libros de menos de tamanio_minimo bytes, o con un solo
+    proceso, se usa parsear_archivo en streaming.
+    """
+    procesos = procesos or os.cpu_count() or 1
+
+    with abrir_datos(fuente) as datos:
+        segmentos = []
+        if procesos > 1 and len(datos) >= tamanio_minimo:
+            segmentos = buscar_segmentos_paginas(datos, procesos)
+        if len(segmentos) < 2:
+            return parsear_archivo(
+                fuente if es_ruta(fuente) else datos,
+                tipo_esperado,
+                diagnostico,
+                streaming=True,
+                combinar_no_consecutivos=combinar_no_consecutivos,
+                montos_dispersos=montos_dispersos,
+            )
+
+        inicio = iniciar_medicion(diagnostico)
+        codificacion = detectar_codificacion(datos)
+        cuerpo = segmentos[0][0]
+        encabezado_completo = leer_encabezado(datos, cuerpo, codificacion)
+
+        # Una ruta la mapea cada proceso; los bytes se reparten por segmento
+        argumentos = [
+            (fuente, inicio_segmento, fin_segmento)
+            if es_ruta(fuente)
+            else (datos[inicio_segmento:fin_segmento], 0, fin_segmento - inicio_segmento)
+            for inicio_segmento, fin_segmento in segmentos
+        ]
+        tipos_iniciales = [
+            tipo_antes_de(datos, cuerpo, inicio_segmento)
+            for inicio_segmento, _ in segmentos
+        ]
+    del datos
+
+    dataframes = []
+    compras_o_ventas = ""
+    with ProcessPoolExecutor(max_workers=min(procesos, len(segmentos))) as pool:
+        futuros = [
+            pool.submit(
+                parsear_segmento,
+                *argumento,
+                codificacion,
+                tipo_esperado,
+                tipo_inicial,
+            )
+            for argumento, tipo_inicial in zip(argumentos, tipos_iniciales)
+        ]
+        for futuro in futuros:
+            df, compras_o_ventas, fin_datos = futuro.result()
+            if df is not None:
+                dataframes.append(df)
+            if fin_datos:
+                for pendiente in futuros:
+                    pendiente.cancel()
+                break
+
+    if dataframes:
+        df = concatenar_movimientos(dataframes)
+    else:
+        df = crear_dataframe_movimientos([])
+    inicio = registrar_tiempo(diagnostico, "movimientos", inicio, len(df))
+
+    df_final_sin_totales = completar_movimientos(
+        df, inicio, diagnostico, combinar_no_consecutivos, montos_dispersos
+    )
+    return df_final_sin_totales, encabezado_completo, compras_o_ventas
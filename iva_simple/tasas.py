@@ -0,0 +1,89 @@
+"""Tabla declarativa de tasas del TXT y alícuotas de ARCA, compilada en búsquedas por libro."""
+
+
+# ============================================================================
+# TABLA DE TASAS Y ALÍCUOTAS
+# ============================================================================
+
+# Cómo se informa cada tasa del TXT en cada libro
+NETO_IVA = "neto_iva"  # dos montos: columnas "<tasa> Neto" y "<tasa> IVA"
+MONTO = "monto"  # un solo monto en la columna "<tasa>" (no se informa a ARCA)
+EXENTO = "exento"  # un solo monto, informado a ARCA como exento o no gravado
+
+# tasa del TXT, código de alícuota de ARCA (None: no se informa), formato en
+# Ventas, formato en Compras. Las tasas que no figuran se tratan como MONTO.
+TABLA_TASAS = [
+    ("Tasa 21%", "5", NETO_IVA, NETO_IVA),
+    ("C.F.21%", "5", NETO_IVA, NETO_IVA),
+    ("T.10.5%", "4", NETO_IVA, NETO_IVA),
+    ("C.F.10.5%", "4", NETO_IVA, NETO_IVA),
+    ("Tasa 27%", "6", NETO_IVA, NETO_IVA),
+    ("R.Monot21", "5", NETO_IVA, MONTO),
+    ("R.Mont.10", "4", NETO_IVA, MONTO),
+    ("Tasa 2.5%", None, NETO_IVA, NETO_IVA),
+    ("T.IMP 21%", None, NETO_IVA, NETO_IVA),
+    ("T.IMP 10%", None, NETO_IVA, NETO_IVA),
+    ("Exento", "3", EXENTO, EXENTO),
+]
+
+LIBROS = ["Ventas", "Compras"]
+
+
+# ============================================================================
+# FORMATO DE LOS CSV DE ARCA POR LIBRO
+# ============================================================================
+
+# Por libro: encabezado del tipo de sujeto, encabezados en los que se informa
+# el IVA (en los otros comprobantes y en las notas de crédito), tipo de sujeto
+# según la condición del TXT, conceptos con tipo de operación "2" y nombres de
+# los CSV (notas de crédito, otros). Un libro que no figura todavía no genera
+# CSV para ARCA ni se compilan sus alícuotas: el de Compras está en desarrollo
+# (el formato de crédito fiscal de ARCA no es el de Ventas con otros nombres).
+FORMATOS_ARCA = {
+    "Ventas": {
+        "sujeto": "Tipo de sujeto comprador",
+        "iva": ["Debito Fiscal Facturado", "Debito Fiscal O.D.P."],
+        "iva_nc": ["Debito Fiscal Facturado"],
+        "sujeto_por_condicion": {"INS.": "1", "EXE": "3", "C.F.": "3", "MONO": "2"},
+        "conceptos_operacion_2": ["84", "85", "152"],
+        "archivos": ("archivo_rf", "archivo_df"),
+    },
+}
+
+
+def compilar_tabla_tasas(tabla, formatos_arca):
+    """Compila la tabla de tasas en búsquedas por libro para el parser y el exportador.
+
+    Devuelve (columnas_neto_iva, alicuotas_arca): columnas_neto_iva[libro] es
+    un dict tasa -> (columna Neto, columna IVA) con las tasas NETO_IVA del
+    libro, y alicuotas_arca[libro] la lista de (columna Neto, columna IVA,
+    columna Exento, código) a informar, con None en las columnas que no
+    aplican; alicuotas_arca solo tiene los libros de formatos_arca.
+    """
+    columnas_neto_iva = {libro: {} for libro in LIBROS}
+    alicuotas_arca = {libro: [] for libro in LIBROS if libro in formatos_arca}
+
+    for tasa, codigo, *formatos in tabla:
+        for libro, formato in zip(LIBROS, formatos):
+            if formato == NETO_IVA:
+                columnas = (tasa + " Neto", tasa + " IVA")
+                columnas_neto_iva[libro][tasa] = columnas
+                if codigo is not None and libro in alicuotas_arca:
+                    alicuotas_arca[libro].append((*columnas, None, codigo))
+            elif formato == EXENTO and codigo is not None and libro in alicuotas_arca:
+                alicuotas_arca[libro].append((None, None, tasa, codigo))
+
+    return columnas_neto_iva, alicuotas_arca
+
+
+COLUMNAS_NETO_IVA, ALICUOTAS_ARCA = compilar_tabla_tasas(TABLA_TASAS, FORMATOS_ARCA)
+
+
+def libro_de(compras_o_ventas):
+    """Libro cuyas tasas se aplican; si no se detectó el tipo se usan las de Compras"""
+    return "Ventas" if compras_o_ventas == "Ventas" else "Compras"
+
+
+def formato_arca(compras_o_ventas):
+    """Formato de los CSV de ARCA del libro; None si el libro todavía no los genera"""
+    return FORMATOS_ARCA.get(compras_o_ventas)
@@ -0,0 +1,8 @@
+"""Procesamiento por lotes desde la línea de comandos; ver iva_simple/lote.py."""
+
+import sys
+
+from iva_simple.lote import main
+
+if __name__ == "__main__":
+    sys.exit(main())